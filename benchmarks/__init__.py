@@ -0,0 +1 @@
+"""Benchmarks of the build tools in ``ptlp``."""
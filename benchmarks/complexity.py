@@ -0,0 +1,215 @@
+"""Check the time complexity of list operations empirically.
+
+Each list operation used in ``scripts/type_list.py`` is timed on lists
+of growing size and the timings are fitted with the models ``a + b *
+f(n)`` of the complexity classes O(1), O(log n), O(n) and O(n log n).
+The class whose model fits best is compared with the class documented
+for the operation. An operation that fits a *costlier* class than the
+documented one, by more than the noise of the measurements, is a
+regression of the interpreter running the check and makes the command
+exit with status 1.
+
+The sizes default to 8,192 to 131,072 elements. The cost per element
+of moving memory changes at the boundaries of the processor caches, a
+step that a fit cannot tell apart from an extra ``log n`` factor, and
+this range stays within one cache level on common hardware. Use
+``--min-exponent`` and ``--max-exponent`` to pick another range.
+
+Usage::
+
+    python -m benchmarks.complexity
+    python -m benchmarks.complexity --max-exponent 18 --repeat 3
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+
+# The classes in order of cost, with the function f(n) of their model.
+CLASSES = [
+    ("O(1)", lambda n: 1.0),
+    ("O(log n)", lambda n: math.log2(n)),
+    ("O(n)", lambda n: float(n)),
+    ("O(n log n)", lambda n: n * math.log2(n)),
+]
+
+CLASS_NAMES = [name for name, _ in CLASSES]
+
+# A cheaper class is preferred when its fit is within this factor of
+# the best one, so noise does not promote an operation to a costlier
+# class.
+TOLERANCE = 1.5
+
+# The relative residual of a fit that is within the noise of the
+# measurements. O(n) and O(n log n) differ by little more than this
+# over the sizes measured, while a fit of the wrong polynomial degree
+# is off by more than half.
+NOISE = 0.15
+
+
+def insert_front(x, k):
+    for _ in range(k):
+        x.insert(0, None)
+
+
+def pop_front(x, k):
+    for _ in range(k):
+        x.pop(0)
+
+
+def pop_back(x, k):
+    for _ in range(k):
+        x.pop()
+
+
+def del_slice(x, k):
+    for _ in range(k):
+        del x[1:5]
+
+
+def membership(x, k):
+    # 1 is never in the list, so the whole list is scanned.
+    for _ in range(k):
+        1 in x
+
+
+def index_last(x, k):
+    x[-1] = 1
+    for _ in range(k):
+        x.index(1)
+
+
+def count(x, k):
+    for _ in range(k):
+        x.count(0)
+
+
+def sort(x, k):
+    for _ in range(k):
+        y = x[:]
+        y.sort()
+
+
+def filled(n):
+    # Every element is the same object, so the operations measure the
+    # list itself, not the cost of reaching objects all over memory.
+    return [0] * n
+
+
+def shuffled(n):
+    x = list(range(n))
+    random.Random(n).shuffle(x)
+    return x
+
+
+# The operations: name, documented class, function running the
+# operation k times on a list, function making the list and k. The
+# mutating operations only change the length of the list by a few
+# hundred elements, which is negligible for the sizes measured.
+OPERATIONS = [
+    ("x.insert(0, v)", "O(n)", insert_front, filled, 100),
+    ("x.pop(0)", "O(n)", pop_front, filled, 100),
+    ("x.pop()", "O(1)", pop_back, filled, 1000),
+    ("del x[1:5]", "O(n)", del_slice, filled, 100),
+    ("v in x", "O(n)", membership, filled, 10),
+    ("x.index(v)", "O(n)", index_last, filled, 10),
+    ("x.count(v)", "O(n)", count, filled, 10),
+    ("x.sort()", "O(n log n)", sort, shuffled, 1),
+]
+
+
+def measure(operation, make, k, sizes, repeat):
+    """Return the best time, in seconds, of one operation for each size.
+
+    The sizes are measured in turn on every round, so a disturbance of
+    the computer while the check runs affects all of them alike.
+    """
+    best = [math.inf] * len(sizes)
+    for _ in range(repeat):
+        for index, n in enumerate(sizes):
+            x = make(n)
+            start = time.perf_counter()
+            operation(x, k)
+            best[index] = min(best[index], time.perf_counter() - start)
+    return [seconds / k for seconds in best]
+
+
+def fit(sizes, times, f):
+    """Return the relative residual of the best fit of ``a + b * f(n)``.
+
+    Errors are weighted by the inverse of the time so that every size
+    counts the same, and ``a`` and ``b`` are kept non-negative.
+    """
+    weights = [1.0 / t for t in times]
+    rows = [(w, w * f(n), w * t) for n, t, w in zip(sizes, times, weights)]
+    s11 = sum(r[0] * r[0] for r in rows)
+    s12 = sum(r[0] * r[1] for r in rows)
+    s22 = sum(r[1] * r[1] for r in rows)
+    s1y = sum(r[0] * r[2] for r in rows)
+    s2y = sum(r[1] * r[2] for r in rows)
+    determinant = s11 * s22 - s12 * s12
+    a = b = 0.0
+    if determinant > 0:
+        a = (s1y * s22 - s2y * s12) / determinant
+        b = (s2y * s11 - s1y * s12) / determinant
+    if a < 0 or b <= 0 or determinant <= 0:
+        # Fall back to the best fit with one of the terms only.
+        candidates = [(s1y / s11, 0.0)]
+        if s22 > 0:
+            candidates.append((0.0, s2y / s22))
+        a, b = min(candidates, key=lambda ab: sum(
+            (r[2] - ab[0] * r[0] - ab[1] * r[1]) ** 2 for r in rows))
+    return math.sqrt(sum((r[2] - a * r[0] - b * r[1]) ** 2 for r in rows)
+                     / len(rows))
+
+
+def classify(residuals):
+    """Return the name of the cheapest class that fits about as well as the best."""
+    best = min(residuals)
+    for name, residual in zip(CLASS_NAMES, residuals):
+        if residual <= best * TOLERANCE:
+            return name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.complexity",
+        description="Check the time complexity of list operations.")
+    parser.add_argument("--min-exponent", type=int, default=13,
+                        help="smallest list is 2**N elements "
+                             "(default: %(default)s)")
+    parser.add_argument("--max-exponent", type=int, default=17,
+                        help="largest list is 2**N elements "
+                             "(default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=7,
+                        help="measurements per size, the best is kept "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    # Two sizes per power of two give more points to fit.
+    sizes = [round(2 ** (step / 2)) for step in
+             range(2 * args.min_exponent, 2 * args.max_exponent + 1)]
+    print("{:<16} {:>12} {:>12} {:>14} {:>14}  {}".format(
+        "operation", "documented", "measured", "ns at n={:,}".format(sizes[0]),
+        "ns at n={:,}".format(sizes[-1]), "result"))
+    failed = 0
+    for name, documented, operation, make, k in OPERATIONS:
+        times = measure(operation, make, k, sizes, args.repeat)
+        residuals = [fit(sizes, times, f) for _, f in CLASSES]
+        measured = classify(residuals)
+        # The documented class is accepted when it fits within the
+        # noise, even if a costlier class happens to fit better.
+        ok = (CLASS_NAMES.index(measured) <= CLASS_NAMES.index(documented) or
+              residuals[CLASS_NAMES.index(documented)] <= NOISE)
+        failed += not ok
+        print("{:<16} {:>12} {:>12} {:>14,.1f} {:>14,.1f}  {}".format(
+            name, documented, measured, times[0] * 1e9, times[-1] * 1e9,
+            "ok" if ok else "FAIL"))
+    if failed:
+        sys.exit("{} operation(s) costlier than documented".format(failed))
+
+
+if __name__ == "__main__":
+    main()
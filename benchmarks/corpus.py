@@ -0,0 +1,134 @@
+"""Generate a synthetic book of chapter scripts.
+
+The chapters are written in the same literate format as
+``scripts/minimal.py``: a title and sections with reStructuredText
+underlines, ``# `` prose paragraphs filled to 70 columns, and numbered
+``print('Example N:')`` examples made of assignments, prints, list
+operations and ``assert`` statements. The corpus is deterministic for a
+given seed, so timings of different runs are comparable.
+
+Usage::
+
+    python -m benchmarks.corpus /tmp/book --chapters 1000
+"""
+
+import argparse
+import os
+import random
+import textwrap
+
+WORDS = """
+list element index slice append extend insert remove object type value
+string integer boolean statement expression operator function method
+iterable sequence mutable ordered comprehension concatenate assignment
+variable binding reference interpreter example result comparison loop
+""".split()
+
+
+def sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def prose(rng, sentences):
+    """Return the lines of a ``# `` comment paragraph."""
+    text = " ".join(sentence(rng) for _ in range(sentences))
+    return ["# " + line for line in textwrap.wrap(text, 68)]
+
+
+def heading(text, underline):
+    return ["# " + text, "# " + underline * len(text)]
+
+
+def example_code(rng, number):
+    """Return the lines of the code of an example."""
+    size = rng.randint(2, 8)
+    values = [rng.randint(0, 99) for _ in range(size)]
+    lines = [
+        "# build a list of {} integers".format(size),
+        "x = {}".format(values),
+        "y = [item * 2 for item in x if item % 2 == 0]",
+        "",
+        "# confirm the results",
+        "assert len(x) == {}".format(size),
+        "assert sum(x) == {}".format(sum(values)),
+        "assert y == {}".format([item * 2 for item in values if item % 2 == 0]),
+    ]
+    kind = number % 4
+    if kind == 0:
+        lines += ["x.append({})".format(number), "print(x[-1], len(x))"]
+    elif kind == 1:
+        lines += ["x.sort()", "print(x)"]
+    elif kind == 2:
+        lines += ["s = ''", "for item in x:", "    s = s + str(item)",
+                  "print(s)"]
+    else:
+        lines += ["try:", "    x[{}]".format(size), "except IndexError as error:",
+                  "    print(error)"]
+    return lines
+
+
+def chapter(rng, title, sections=4, examples=5):
+    """Return the lines of a chapter script."""
+    lines = heading(title, "=") + [""]
+    lines += ["# .. contents::", "#    :local:", "#    :depth: 1",
+              "#    :backlinks: none", ""]
+    number = 0
+    for section in range(1, sections + 1):
+        lines += heading("Section {}".format(section), "-") + [""]
+        for _ in range(examples):
+            number += 1
+            lines += prose(rng, rng.randint(2, 5)) + [""]
+            lines += ["print('Example {}:')".format(number), ""]
+            if number % 7 == 0:
+                # Code shown but not run, like the tracebacks of the
+                # chapters.
+                lines += ["#    raise ValueError({})".format(number), ""]
+            else:
+                lines += example_code(rng, number) + [""]
+    lines += heading("References", "-") + [""]
+    lines += ["# + `Python Tutorial`_", "",
+              "# .. _Python Tutorial: https://docs.python.org/3/tutorial/"]
+    return lines
+
+
+def generate(root, chapters, seed=0, sections=4, examples=5):
+    """Write ``chapters`` chapter scripts to ``root/scripts``.
+
+    The other directories of a book, ``rst``, ``output`` and ``docs``,
+    are created empty, except for an empty ``docs/NAME.html`` for each
+    chapter, as ``ptlp.search`` only indexes the pages that have one.
+    Returns the number of lines written.
+    """
+    rng = random.Random(seed)
+    for directory in ("scripts", "rst", "output", "docs"):
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+    width = len(str(chapters))
+    total = 0
+    for index in range(chapters):
+        name = "chapter_{:0{}}".format(index, width)
+        lines = chapter(rng, "Chapter {}".format(index), sections, examples)
+        with open(os.path.join(root, "scripts", name + ".py"), "w",
+                  encoding="utf-8") as target:
+            target.write("\n".join(lines) + "\n")
+        open(os.path.join(root, "docs", name + ".html"), "w").close()
+        total += len(lines)
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.corpus",
+        description="Generate a synthetic book of chapter scripts.")
+    parser.add_argument("root", help="directory to write the book to")
+    parser.add_argument("-n", "--chapters", type=int, default=10,
+                        help="number of chapters (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed (default: %(default)s)")
+    args = parser.parse_args(argv)
+    lines = generate(args.root, args.chapters, args.seed)
+    print("{} chapter(s), {} line(s)".format(args.chapters, lines))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Time the stages of the build on synthetic books.
+
+For each book size a corpus is generated with ``benchmarks.corpus`` and
+the stages of the build are timed separately:
+
++ ``extract``, converting the scripts to rst with ``ptlp.extract``.
++ ``execute``, running the examples of the scripts with
+  ``ptlp.examples``, in this process.
++ ``index``, building the search index with ``ptlp.search``.
++ ``render``, converting the rst documents to HTML with docutils, the
+  library Sphinx uses. The stage is skipped when docutils is not
+  installed.
+
+Throughput is reported in script lines per second and chapters per
+second. The stages run in a single process so the numbers measure the
+tools, not the number of CPUs.
+
+Usage::
+
+    python -m benchmarks.pipeline                     # 10, 1k and 10k chapters
+    python -m benchmarks.pipeline --sizes 10 100
+    python -m benchmarks.pipeline --stages extract index
+"""
+
+import argparse
+import tempfile
+import time
+
+from benchmarks import corpus
+from ptlp import build, examples, search
+
+try:
+    import docutils.core
+except ImportError:
+    docutils = None
+
+SIZES = [10, 1000, 10000]
+
+
+def stage_extract(chapter_list):
+    for chapter in chapter_list:
+        build.build_rst(chapter)
+
+
+def stage_execute(chapter_list):
+    for chapter in chapter_list:
+        for result in examples.run(chapter.script):
+            if result.error is not None:
+                raise RuntimeError("{}: {}".format(chapter.name, result.error))
+
+
+def stage_index(chapter_list):
+    search.update(chapter_list[0].root, rebuild=True)
+
+
+def stage_render(chapter_list):
+    for chapter in chapter_list:
+        with open(chapter.rst, encoding="utf-8") as source:
+            docutils.core.publish_string(
+                source.read(), writer_name="html",
+                settings_overrides={"report_level": 5})
+
+
+# The stages in the order they run; render needs the rst of extract.
+STAGES = [
+    ("extract", stage_extract),
+    ("execute", stage_execute),
+    ("index", stage_index),
+    ("render", stage_render),
+]
+
+
+def run(size, stages, seed=0, report=print):
+    """Time ``stages`` on a book of ``size`` chapters."""
+    with tempfile.TemporaryDirectory(prefix="ptlp-bench-") as root:
+        lines = corpus.generate(root, size, seed)
+        chapter_list = build.chapters(root)
+        for name, function in STAGES:
+            if name not in stages:
+                continue
+            if name == "render" and docutils is None:
+                report("{:>8} {:<8} {:>10}".format(size, name,
+                                                  "skipped (no docutils)"))
+                continue
+            start = time.perf_counter()
+            function(chapter_list)
+            seconds = time.perf_counter() - start
+            report("{:>8} {:<8} {:>10.3f} {:>14,.0f} {:>12,.1f}".format(
+                size, name, seconds, lines / seconds, size / seconds))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.pipeline",
+        description="Time the stages of the build on synthetic books.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES,
+                        help="numbers of chapters (default: %(default)s)")
+    parser.add_argument("--stages", nargs="+", default=[s for s, _ in STAGES],
+                        choices=[s for s, _ in STAGES],
+                        help="stages to time (default: all)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="random seed of the corpus (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if "render" in args.stages and "extract" not in args.stages:
+        parser.error("the render stage needs the extract stage")
+    print("{:>8} {:<8} {:>10} {:>14} {:>12}".format(
+        "chapters", "stage", "seconds", "lines/s", "chapters/s"))
+    for size in args.sizes:
+        run(size, args.stages, args.seed)
+
+
+if __name__ == "__main__":
+    main()
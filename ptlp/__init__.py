@@ -0,0 +1,7 @@
+"""Build tools for *Python to learn Python* (PTLP).
+
+The chapters of the book are the literate Python scripts in
+``scripts/``. The modules in this package turn them into the
+reStructuredText documents in ``rst/`` and the captured output in
+``output/``.
+"""
@@ -0,0 +1,268 @@
+"""Build the chapters of the book.
+
+Each chapter script ``scripts/NAME.py`` is built into two artifacts:
+
++ ``rst/NAME.rst``, the reStructuredText document extracted from the
+  script by ``ptlp.extract``.
++ ``output/NAME.py.output``, the output of running the script with
+  ``ptlp.run``.
+
+Artifacts are rebuilt only when the script or the tool that builds
+them has changed since the last build, see ``ptlp.manifest``.
+
+Scripts whose name starts with an underscore, e.g. ``_timing.py``, are
+modules imported by chapters, not chapters. The output of a chapter is
+also rebuilt when one of these modules it imports has changed.
+
+Usage::
+
+    python -m ptlp.build              # build all chapters
+    python -m ptlp.build minimal      # build one chapter
+    python -m ptlp.build --force      # ignore the manifest
+    python -m ptlp.build -j 8         # use 8 worker processes
+    python -m ptlp.build --runner fork  # fork scripts from a warm server
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ptlp import extract, forkserver, manifest, run
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MANIFEST = ".build-manifest.json"
+
+
+class Chapter:
+    """The paths of a chapter script and of the artifacts built from it."""
+
+    def __init__(self, root, name):
+        self.root = root
+        self.name = name
+        self.script = os.path.join(root, "scripts", name + ".py")
+        self.rst = os.path.join(root, "rst", name + ".rst")
+        self.output = os.path.join(root, "output", name + ".py.output")
+        self.profile = os.path.join(root, "output", name + ".py.profile.json")
+
+    def __repr__(self):
+        return "Chapter({!r})".format(self.name)
+
+
+def is_chapter(filename):
+    """Return True if ``filename`` of ``scripts/`` is a chapter script."""
+    return filename.endswith(".py") and not filename.startswith("_")
+
+
+def chapters(root=ROOT, names=None):
+    """Return the chapters in ``root``, all of them if ``names`` is None."""
+    if names is None:
+        names = sorted(filename[:-len(".py")]
+                       for filename in os.listdir(os.path.join(root, "scripts"))
+                       if is_chapter(filename))
+    return [Chapter(root, name) for name in names]
+
+
+def check_names(parser, root, names):
+    """Exit with a usage error from ``parser`` if a name is not a chapter."""
+    known = {chapter.name for chapter in chapters(root)}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        parser.error("unknown chapter(s): {} (choose from {})".format(
+            ", ".join(unknown), ", ".join(sorted(known))))
+
+
+def build_rst(chapter):
+    with open(chapter.script, encoding="utf-8") as source, \
+            open(chapter.rst, "w", encoding="utf-8") as target:
+        extract.convert(source, target)
+
+
+# The ``ForkServer`` of this process when scripts are run with the
+# fork runner, see ``start_runner()``.
+fork_server = None
+
+
+def start_runner(runner, modules=()):
+    """Set up this process, or a pool worker, to run scripts with ``runner``.
+
+    ``runner`` is ``"subprocess"`` to run each script with a new
+    interpreter or ``"fork"`` to fork it from a ``ForkServer`` that has
+    already imported ``modules``.
+    """
+    global fork_server
+    fork_server = forkserver.ForkServer(modules) if runner == "fork" else None
+
+
+def build_output(chapter):
+    if fork_server is not None:
+        fork_server.run(chapter.script, chapter.output, cwd=chapter.root)
+    else:
+        run.run(chapter.script, chapter.output, cwd=chapter.root)
+
+
+# The artifacts of a chapter: the name recorded in the manifest, the
+# attribute holding its path, the function that builds it and the
+# function returning the key of the tool that builds it.
+ARTIFACTS = [
+    ("rst", "rst", build_rst,
+     lambda: manifest.module_hash(extract)),
+    ("output", "output", build_output,
+     lambda: manifest.combine(manifest.module_hash(run),
+                              manifest.module_hash(forkserver),
+                              manifest.interpreter_key())),
+]
+
+BUILDERS = {artifact: builder for artifact, _, builder, _ in ARTIFACTS}
+
+
+class Result:
+    """The outcome of building the stale artifacts of a chapter."""
+
+    def __init__(self, chapter, keys, error=None):
+        self.chapter = chapter
+        # Maps the name of each artifact built to its key.
+        self.keys = keys
+        self.error = error
+
+
+def module_keys(chapter):
+    """Return the hashes of the modules of ``scripts/`` ``chapter`` imports."""
+    scripts = os.path.dirname(chapter.script)
+    keys = []
+    for name in forkserver.chapter_imports([chapter.script]):
+        path = os.path.join(scripts, name + ".py")
+        if not is_chapter(name + ".py") and os.path.exists(path):
+            keys.append(manifest.file_hash(path))
+    return keys
+
+
+def stale(chapter, cache, tool_keys, force=False):
+    """Return a dict mapping the stale artifacts of ``chapter`` to keys."""
+    script_key = manifest.file_hash(chapter.script)
+    # The output, unlike the rst, depends on the modules the script runs.
+    source_keys = {"rst": [script_key],
+                   "output": [script_key] + module_keys(chapter)}
+    keys = {}
+    for artifact, attribute, _, _ in ARTIFACTS:
+        key = manifest.combine(*source_keys[artifact], tool_keys[artifact])
+        path = getattr(chapter, attribute)
+        if force or not cache.is_fresh(chapter.name, artifact, key, path):
+            keys[artifact] = key
+    return keys
+
+
+def build_chapter(chapter, keys):
+    """Build the artifacts named in ``keys``, returning a ``Result``.
+
+    This runs in a worker process so errors are returned, not raised.
+    """
+    built = {}
+    for artifact, key in keys.items():
+        try:
+            BUILDERS[artifact](chapter)
+        except Exception as error:
+            return Result(chapter, built, error)
+        built[artifact] = key
+    return Result(chapter, built)
+
+
+def describe(result):
+    paths = ", ".join(
+        os.path.relpath(getattr(result.chapter, attribute), result.chapter.root)
+        for artifact, attribute, _, _ in ARTIFACTS if artifact in result.keys)
+    if result.error is not None:
+        return "{}: FAILED: {}".format(result.chapter.name, result.error)
+    return "{}: {}".format(result.chapter.name, paths)
+
+
+def build(chapter_list, cache, force=False, jobs=1, runner="subprocess",
+          report=print):
+    """Build the stale artifacts of ``chapter_list``.
+
+    Chapters are independent, so with ``jobs`` greater than one they
+    are built by a pool of ``jobs`` worker processes. Progress is
+    reported as each chapter finishes but the results are returned,
+    and recorded in ``cache``, in the order of ``chapter_list``.
+
+    ``runner`` selects how scripts are run, see ``start_runner()``.
+    With the fork runner each worker warms up once and then forks a
+    child for each of its chapters.
+    """
+    tool_keys = {artifact: tool_key()
+                 for artifact, _, _, tool_key in ARTIFACTS}
+    work = []
+    for chapter in chapter_list:
+        keys = stale(chapter, cache, tool_keys, force)
+        if keys:
+            # Forget the old keys first so a failed build is retried.
+            for artifact in keys:
+                cache.forget(chapter.name, artifact)
+            work.append((chapter, keys))
+
+    results = [None] * len(work)
+    modules = ()
+    if runner == "fork":
+        modules = forkserver.chapter_imports(
+            chapter.script for chapter, keys in work if "output" in keys)
+
+    def done(index, result):
+        results[index] = result
+        finished = sum(result is not None for result in results)
+        report("[{}/{}] {}".format(finished, len(work), describe(result)))
+
+    if jobs <= 1 or len(work) <= 1:
+        start_runner(runner, modules)
+        for index, (chapter, keys) in enumerate(work):
+            done(index, build_chapter(chapter, keys))
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=start_runner,
+                                 initargs=(runner, modules)) as pool:
+            futures = {pool.submit(build_chapter, chapter, keys): index
+                       for index, (chapter, keys) in enumerate(work)}
+            for future in as_completed(futures):
+                done(futures[future], future.result())
+
+    for result in results:
+        for artifact, key in result.keys.items():
+            cache.record(result.chapter.name, artifact, key)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.build",
+        description="Build the rst and output files of the chapters.")
+    parser.add_argument("names", nargs="*", metavar="chapter",
+                        help="chapter to build, e.g. minimal (default: all)")
+    parser.add_argument("--root", default=ROOT,
+                        help="root of the book (default: %(default)s)")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="rebuild all artifacts, ignoring the manifest")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes "
+                             "(default: number of CPUs, %(default)s)")
+    parser.add_argument("--runner", choices=["subprocess", "fork"],
+                        default="subprocess",
+                        help="run each script in a new interpreter or fork "
+                             "it from a warm one (default: %(default)s)")
+    args = parser.parse_args(argv)
+    check_names(parser, args.root, args.names)
+
+    cache = manifest.Manifest(os.path.join(args.root, MANIFEST))
+    try:
+        results = build(chapters(args.root, args.names or None), cache,
+                        force=args.force, jobs=args.jobs,
+                        runner=args.runner)
+    finally:
+        cache.save()
+    failed = [result for result in results if result.error is not None]
+    built = sum(len(result.keys) for result in results)
+    print("{} artifact(s) built, {} chapter(s) failed".format(built, len(failed)))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Run a chapter script one example at a time.
+
+The examples of a chapter start at the ``print('Example N:')`` lines
+of the script. This module splits a script into its examples and runs
+them in order in a single namespace, as if the script were run as a
+whole, recording the output, exception and wall time of each example
+separately.
+
+The code before the first example, if any, is run as example 0.
+
+Usage::
+
+    python -m ptlp.examples scripts/type_list.py
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import traceback
+
+from ptlp.extract import EXAMPLE_RE
+
+
+class Example:
+    """The source code of an example of a chapter script."""
+
+    def __init__(self, number, line, source):
+        self.number = number
+        # The line of the script where the example starts, from 1.
+        self.line = line
+        self.source = source
+
+    def __repr__(self):
+        return "Example({}, line={})".format(self.number, self.line)
+
+
+class ExampleResult:
+    """What happened when an example was run."""
+
+    def __init__(self, example, output, wall_time, cpu_time, error=None):
+        self.example = example
+        self.output = output
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        # The formatted traceback if the example raised an exception.
+        self.error = error
+
+
+def parse(lines):
+    """Yield the examples of the script ``lines``, in order.
+
+    ``lines`` is any iterable of strings ending in a newline, e.g. an
+    open file.
+    """
+    number, start, source = 0, 1, []
+    for index, line in enumerate(lines, 1):
+        match = EXAMPLE_RE.match(line)
+        if match:
+            if any(code.strip() for code in source):
+                yield Example(number, start, "".join(source))
+            number = int(match.group(2))
+            start, source = index, []
+        source.append(line)
+    if any(code.strip() for code in source):
+        yield Example(number, start, "".join(source))
+
+
+def run_example(example, namespace, filename):
+    """Run ``example`` in ``namespace`` and return an ``ExampleResult``."""
+    # Pad with blank lines so line numbers in tracebacks and warnings
+    # are those of the script.
+    code = compile("\n" * (example.line - 1) + example.source, filename, "exec")
+    output = io.StringIO()
+    error = None
+    start, cpu_start = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stdout(output):
+        try:
+            exec(code, namespace)
+        except Exception:
+            error = traceback.format_exc()
+    wall_time = time.perf_counter() - start
+    cpu_time = time.process_time() - cpu_start
+    return ExampleResult(example, output.getvalue(), wall_time, cpu_time,
+                         error)
+
+
+def new_namespace(filename):
+    return {"__name__": "__main__", "__file__": filename,
+            "__builtins__": __builtins__}
+
+
+@contextlib.contextmanager
+def script_path(filename):
+    """Put the directory of ``filename`` first on ``sys.path``.
+
+    A script run by the interpreter can import the modules next to it,
+    e.g. ``scripts/_timing.py``, and so can its examples run here.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    sys.path.insert(0, directory)
+    try:
+        yield
+    finally:
+        sys.path.remove(directory)
+
+
+def run(filename, keep_going=False):
+    """Yield an ``ExampleResult`` for each example of a chapter script.
+
+    Examples usually depend on names bound by earlier examples, so the
+    run stops at the first example that raises an exception unless
+    ``keep_going`` is true.
+    """
+    namespace = new_namespace(filename)
+    with open(filename, encoding="utf-8") as source, script_path(filename):
+        for example in parse(source):
+            result = run_example(example, namespace, filename)
+            yield result
+            if result.error is not None and not keep_going:
+                break
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.examples",
+        description="Run a chapter script one example at a time.")
+    parser.add_argument("script", help="chapter script")
+    parser.add_argument("-k", "--keep-going", action="store_true",
+                        help="run the remaining examples after an error")
+    parser.add_argument("-o", "--output",
+                        help="also write the output of the script to this file")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    target = open(args.output, "w", encoding="utf-8") if args.output else None
+    with target or contextlib.nullcontext():
+        print("{:>8} {:>6} {:>12}  {}".format("example", "line", "time (ms)",
+                                              "status"))
+        for result in run(args.script, args.keep_going):
+            if target:
+                target.write(result.output)
+            status = "ok" if result.error is None else "error"
+            print("{:>8} {:>6} {:>12.3f}  {}".format(
+                result.example.number, result.example.line,
+                result.wall_time * 1000, status))
+            if result.error is not None:
+                failed += 1
+                print(result.error, file=sys.stderr)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
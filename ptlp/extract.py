@@ -0,0 +1,164 @@
+"""Convert a chapter script into a reStructuredText document.
+
+A chapter script is a Python script whose comments are written in
+reStructuredText. The conversion reads the script one line at a time
+and yields the document one line at a time, so memory use does not
+grow with the size of the chapter.
+
+The script is read as a sequence of *paragraphs*, groups of lines
+separated by blank lines. The rules are:
+
++ A paragraph made only of ``#`` comment lines is prose. The leading
+  ``# `` is removed from each line.
+
++ A ``print('Example N:')`` line opens a literal block. The line is
+  rendered as the comment ``# Example N:`` and the code that follows
+  becomes the body of the block.
+
++ Inside a literal block, comment paragraphs followed by more code
+  belong to the block. The comment paragraphs between the last code
+  of an example and the next example return to prose, except those
+  whose text is indented, e.g. ``#    raise FileNotFoundError``, which
+  show code that is not meant to run.
+
++ An example made only of comments, such as examples of comments,
+  has no code to tell where it ends. A ``# .. ptlp: end-example``
+  paragraph closes the literal block: the comment paragraphs before
+  it belong to the block, and the marker itself is not rendered.
+
+Deciding whether a comment paragraph closes a literal block needs the
+paragraphs up to the next line of code, so only that run of comments
+is held in memory.
+
+Usage::
+
+    python -m ptlp.extract scripts/minimal.py -o rst/minimal.rst
+"""
+
+import argparse
+import re
+import sys
+
+EXAMPLE_RE = re.compile(r"^print\('(Example (\d+):)'\)\s*$")
+
+INDENT = "    "
+
+END_EXAMPLE = "# .. ptlp: end-example"
+
+
+def paragraphs(lines):
+    """Yield lists of the lines between blank lines, without newlines."""
+    paragraph = []
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if line.strip():
+            paragraph.append(line)
+        elif paragraph:
+            yield paragraph
+            paragraph = []
+    if paragraph:
+        yield paragraph
+
+
+def is_comment(paragraph):
+    return all(line.startswith("#") for line in paragraph)
+
+
+def is_indented_comment(paragraph):
+    return all(line.startswith("#  ") or line == "#" for line in paragraph)
+
+
+def prose(paragraph):
+    for line in paragraph:
+        yield line[2:] if line.startswith("# ") else line[1:]
+
+
+def literal(paragraph):
+    for line in paragraph:
+        yield INDENT + line
+
+
+def script_to_rst(lines):
+    """Yield the lines of the document for the script ``lines``.
+
+    ``lines`` is any iterable of strings, e.g. an open file. The lines
+    yielded do not end with a newline character.
+    """
+    in_literal = False
+    pending = []
+    first = True
+
+    def block(rendered):
+        # Blocks are separated by a single blank line.
+        nonlocal first
+        if not first:
+            yield ""
+        first = False
+        yield from rendered
+
+    def flush(code_follows):
+        nonlocal in_literal
+        for paragraph in pending:
+            if in_literal and (code_follows or is_indented_comment(paragraph)):
+                yield from block(literal(paragraph))
+            else:
+                in_literal = False
+                yield from block(prose(paragraph))
+        pending.clear()
+
+    for paragraph in paragraphs(lines):
+        match = EXAMPLE_RE.match(paragraph[0])
+        if match:
+            yield from flush(False)
+            in_literal = True
+            yield from block(["::"])
+            yield from block([INDENT + "# " + match.group(1)])
+            if len(paragraph) > 1:
+                yield from block(literal(paragraph[1:]))
+        elif paragraph == [END_EXAMPLE]:
+            yield from flush(True)
+            in_literal = False
+        elif is_comment(paragraph):
+            if in_literal:
+                pending.append(paragraph)
+            else:
+                yield from block(prose(paragraph))
+        else:
+            yield from flush(True)
+            if not in_literal:
+                in_literal = True
+                yield from block(["::"])
+            yield from block(literal(paragraph))
+    yield from flush(False)
+
+
+def convert(source, target):
+    """Write the document for the open script ``source`` to ``target``."""
+    for line in script_to_rst(source):
+        target.write(line)
+        target.write("\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.extract",
+        description="Convert a chapter script into reStructuredText.")
+    parser.add_argument("script", help="chapter script, or - for stdin")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output document, or - for stdout (default)")
+    args = parser.parse_args(argv)
+
+    if args.script == "-":
+        source = sys.stdin
+    else:
+        source = open(args.script, encoding="utf-8")
+    with source:
+        if args.output == "-":
+            convert(source, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as target:
+                convert(source, target)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Run chapter scripts in children forked from a warm interpreter.
+
+Running a script with a new ``python`` process pays for interpreter
+startup, the ``site`` import and the imports of the script every
+time. For short chapters that is most of the run time. A
+``ForkServer`` imports the modules the chapters use once, then forks
+a child for each chapter, which starts with those modules already
+loaded.
+
+The output is captured in the same format as ``ptlp.run``: the child
+writes its standard output to the output file and leaves standard
+error on the terminal.
+
+Forking is only available on POSIX systems.
+"""
+
+import importlib
+import io
+import os
+import re
+import runpy
+import sys
+import traceback
+
+from ptlp.run import RunError
+
+# Modules imported by the server whether or not a chapter uses them.
+PRELOAD = ["math"]
+
+IMPORT_RE = re.compile(r"^(?:import|from)\s+([A-Za-z_]\w*)")
+
+
+def chapter_imports(scripts):
+    """Return the names of the top-level modules imported by ``scripts``."""
+    names = set()
+    for script in scripts:
+        with open(script, encoding="utf-8") as source:
+            for line in source:
+                match = IMPORT_RE.match(line)
+                if match:
+                    names.add(match.group(1))
+    return sorted(names)
+
+
+class ForkServer:
+    """A warm interpreter that runs each chapter in a forked child."""
+
+    def __init__(self, modules=()):
+        if not hasattr(os, "fork"):
+            raise RuntimeError("the fork runner needs os.fork()")
+        self.modules = []
+        for name in list(PRELOAD) + list(modules):
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # The chapter will fail with the same error when it
+                # runs, where it can be reported against the chapter.
+                continue
+            self.modules.append(name)
+
+    def run(self, script, output, cwd=None):
+        """Run ``script`` writing its standard output to ``output``."""
+        # Unflushed output of the server would be written twice.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        with open(output, "wb") as target:
+            pid = os.fork()
+            if pid == 0:
+                status = 1
+                try:
+                    os.dup2(target.fileno(), 1)
+                    status = run_child(script, cwd)
+                finally:
+                    os._exit(status)
+        _, status = os.waitpid(pid, 0)
+        code = os.waitstatus_to_exitcode(status)
+        if code != 0:
+            raise RunError("{} exited with status {}".format(script, code))
+
+
+def run_child(script, cwd):
+    """Run ``script`` as ``__main__`` in a forked child, returning its status."""
+    # Set up the process the way ``python script`` would.
+    if cwd is not None:
+        os.chdir(cwd)
+    script = os.path.abspath(script)
+    sys.argv = [script]
+    sys.path[0] = os.path.dirname(script)
+    sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False),
+                                  encoding=sys.stdout.encoding)
+    try:
+        runpy.run_path(script, run_name="__main__")
+        status = 0
+    except SystemExit as exit:
+        if exit.code is None:
+            status = 0
+        elif isinstance(exit.code, int):
+            status = exit.code
+        else:
+            print(exit.code, file=sys.stderr)
+            status = 1
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return status
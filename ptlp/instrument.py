@@ -0,0 +1,190 @@
+"""Measure the cost of each example of the chapters.
+
+An instrumented run executes a chapter one example at a time, see
+``ptlp.examples``, and records for each example:
+
++ ``wall_time`` and ``cpu_time``, in seconds.
++ ``peak_bytes``, the peak of memory traced by ``tracemalloc`` while
+  the example runs, above the memory in use when it starts. Examples
+  measuring memory themselves may call ``tracemalloc.reset_peak()``:
+  the peak before each reset is kept, so the peak recorded is still
+  the highest of the example. An example that stops tracing itself
+  has no valid peak: it gets ``null`` and the status ``untraced``, and
+  tracing is restarted for the next example.
++ ``net_blocks``, the change in the number of memory blocks held by
+  the interpreter while the example runs, from
+  ``sys.getallocatedblocks()``. It is not a count of allocations: an
+  example allocating a million objects and freeing them all gets about
+  0.
+
+The measurements are written next to the output of the chapter, e.g.
+``output/minimal.py.profile.json`` for ``output/minimal.py.output``.
+Tracing memory slows the examples down, so the times are only
+comparable with those of other instrumented runs.
+
+Usage::
+
+    python -m ptlp.instrument                  # profile all chapters
+    python -m ptlp.instrument minimal          # profile one chapter
+    python -m ptlp.instrument --report         # costliest examples
+    python -m ptlp.instrument --report --sort peak_bytes --top 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+from ptlp import build, examples
+
+MEASURES = ["wall_time", "cpu_time", "peak_bytes", "net_blocks"]
+
+
+class PeakKeeper:
+    """Keep the traced peak across calls of ``tracemalloc.reset_peak()``.
+
+    In the ``with`` block, ``tracemalloc.reset_peak`` is replaced by a
+    function recording the peak before resetting it, and ``peak()``
+    returns the highest peak traced since the block started.
+    """
+
+    def __init__(self):
+        self._highest = 0
+        self._reset_peak = tracemalloc.reset_peak
+
+    def reset_peak(self):
+        if tracemalloc.is_tracing():
+            self._highest = max(self._highest,
+                                tracemalloc.get_traced_memory()[1])
+        self._reset_peak()
+
+    def peak(self):
+        return max(self._highest, tracemalloc.get_traced_memory()[1])
+
+    def __enter__(self):
+        self._reset_peak()
+        self._highest = 0
+        tracemalloc.reset_peak = self.reset_peak
+        return self
+
+    def __exit__(self, *exc_info):
+        tracemalloc.reset_peak = self._reset_peak
+
+
+def profile(filename, keep_going=False):
+    """Yield a dict of measurements for each example of ``filename``."""
+    tracemalloc.start()
+    try:
+        namespace = examples.new_namespace(filename)
+        with open(filename, encoding="utf-8") as source, \
+                examples.script_path(filename):
+            for example in examples.parse(source):
+                with PeakKeeper() as keeper:
+                    memory, _ = tracemalloc.get_traced_memory()
+                    blocks = sys.getallocatedblocks()
+                    result = examples.run_example(example, namespace,
+                                                  filename)
+                    blocks = sys.getallocatedblocks() - blocks
+                    traced = tracemalloc.is_tracing()
+                    if traced:
+                        peak = keeper.peak()
+                if not traced:
+                    tracemalloc.start()
+                if result.error is not None:
+                    status = "error"
+                else:
+                    status = "ok" if traced else "untraced"
+                yield {
+                    "example": example.number,
+                    "line": example.line,
+                    "status": status,
+                    "wall_time": result.wall_time,
+                    "cpu_time": result.cpu_time,
+                    "peak_bytes": peak - memory if traced else None,
+                    "net_blocks": blocks,
+                }
+                if result.error is not None and not keep_going:
+                    break
+    finally:
+        tracemalloc.stop()
+
+
+def profile_chapter(chapter):
+    """Write the measurements of ``chapter`` to its ``.profile.json`` file."""
+    data = {
+        "chapter": chapter.name,
+        "python": sys.version,
+        "examples": list(profile(chapter.script)),
+    }
+    with open(chapter.profile, "w", encoding="utf-8") as target:
+        json.dump(data, target, indent=4)
+        target.write("\n")
+    return data
+
+
+def load(chapter_list):
+    """Yield ``(chapter name, example measurements)`` from the sidecars."""
+    for chapter in chapter_list:
+        try:
+            with open(chapter.profile, encoding="utf-8") as source:
+                data = json.load(source)
+        except FileNotFoundError:
+            continue
+        for measures in data["examples"]:
+            yield chapter.name, measures
+
+
+def report(rows, sort="wall_time", top=None):
+    """Print a table of the examples ``rows``, costliest first."""
+    def key(row):
+        value = row[1][sort]
+        return float("-inf") if value is None else value
+
+    rows = sorted(rows, key=key, reverse=True)
+    if top is not None:
+        rows = rows[:top]
+    print("{:<20} {:>8} {:>6} {:>12} {:>12} {:>12} {:>10}  {}".format(
+        "chapter", "example", "line", "wall (ms)", "cpu (ms)", "peak (KiB)",
+        "net blocks", "status"))
+    for name, measures in rows:
+        peak = measures["peak_bytes"]
+        peak = "-" if peak is None else "{:.1f}".format(peak / 1024)
+        print("{:<20} {:>8} {:>6} {:>12.3f} {:>12.3f} {:>12} {:>10}  {}".format(
+            name, measures["example"], measures["line"],
+            measures["wall_time"] * 1000, measures["cpu_time"] * 1000,
+            peak, measures["net_blocks"], measures["status"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.instrument",
+        description="Measure the cost of each example of the chapters.")
+    parser.add_argument("names", nargs="*", metavar="chapter",
+                        help="chapter to profile, e.g. minimal (default: all)")
+    parser.add_argument("--root", default=build.ROOT,
+                        help="root of the book (default: %(default)s)")
+    parser.add_argument("--report", action="store_true",
+                        help="print the examples of the existing profiles "
+                             "instead of profiling the chapters")
+    parser.add_argument("--sort", choices=MEASURES, default="wall_time",
+                        help="measure to sort the report by "
+                             "(default: %(default)s)")
+    parser.add_argument("--top", type=int,
+                        help="only report the costliest examples")
+    args = parser.parse_args(argv)
+    build.check_names(parser, args.root, args.names)
+
+    chapter_list = build.chapters(args.root, args.names or None)
+    if args.report:
+        report(load(chapter_list), args.sort, args.top)
+        return
+    for chapter in chapter_list:
+        data = profile_chapter(chapter)
+        print("{}: {} example(s)".format(
+            os.path.relpath(chapter.profile, chapter.root),
+            len(data["examples"])))
+
+
+if __name__ == "__main__":
+    main()
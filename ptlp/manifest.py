@@ -0,0 +1,94 @@
+"""Content-hash manifest for incremental builds.
+
+The manifest records, for each chapter and each artifact built from
+it, a key computed from the content of the chapter script and of the
+tool that builds the artifact. When the key of an artifact matches the
+one recorded at the last build, and the artifact still exists, the
+artifact is up to date and is not built again.
+
+The manifest is a JSON file of the form::
+
+    {
+        "version": 1,
+        "chapters": {
+            "minimal": {"rst": "9f86d0...", "output": "60303a..."},
+            ...
+        }
+    }
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+# Bump when the layout of the manifest file changes.
+VERSION = 1
+
+CHUNK_SIZE = 1 << 16
+
+
+def file_hash(path):
+    """Return the SHA-256 hex digest of the content of ``path``."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as source:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def module_hash(module):
+    """Return a key that changes whenever the source of ``module`` does."""
+    return file_hash(module.__file__)
+
+
+def interpreter_key():
+    """Return a key for the interpreter that runs the chapters.
+
+    The output of a script can change between Python versions, e.g.
+    the text of error messages, so the version is part of the key of
+    the captured output.
+    """
+    return hashlib.sha256(sys.version.encode("utf-8")).hexdigest()
+
+
+def combine(*keys):
+    """Return a single key for the sequence of ``keys``."""
+    return hashlib.sha256("\0".join(keys).encode("ascii")).hexdigest()
+
+
+class Manifest:
+    """The keys of the artifacts built at the last build."""
+
+    def __init__(self, path):
+        self.path = path
+        self.chapters = {}
+        try:
+            with open(path, encoding="utf-8") as source:
+                data = json.load(source)
+        except (OSError, ValueError):
+            # A missing or damaged manifest means nothing is cached.
+            return
+        if data.get("version") == VERSION:
+            self.chapters = data.get("chapters", {})
+
+    def is_fresh(self, chapter, artifact, key, path):
+        """Return True if ``path`` was built from ``key`` and still exists."""
+        recorded = self.chapters.get(chapter, {}).get(artifact)
+        return recorded == key and os.path.exists(path)
+
+    def record(self, chapter, artifact, key):
+        self.chapters.setdefault(chapter, {})[artifact] = key
+
+    def forget(self, chapter, artifact):
+        self.chapters.get(chapter, {}).pop(artifact, None)
+
+    def save(self):
+        # Write to a temporary file and rename it so an interrupted
+        # build never leaves a truncated manifest behind.
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as target:
+            json.dump({"version": VERSION, "chapters": self.chapters},
+                      target, indent=4, sort_keys=True)
+            target.write("\n")
+        os.replace(temporary, self.path)
@@ -0,0 +1,45 @@
+"""Run a chapter script and capture its output.
+
+The output of a script is what it prints to standard output. Anything
+printed to standard error, e.g. ``SyntaxWarning`` messages, is left on
+the terminal.
+
+Usage::
+
+    python -m ptlp.run scripts/minimal.py -o output/minimal.py.output
+"""
+
+import argparse
+import subprocess
+import sys
+
+
+class RunError(Exception):
+    """Raised when a chapter script exits with a non-zero status."""
+
+
+def run(script, output, cwd=None):
+    """Run ``script`` writing its standard output to the path ``output``."""
+    with open(output, "wb") as target:
+        status = subprocess.call([sys.executable, script],
+                                 stdout=target, cwd=cwd)
+    if status != 0:
+        raise RunError("{} exited with status {}".format(script, status))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.run",
+        description="Run a chapter script and capture its output.")
+    parser.add_argument("script", help="chapter script")
+    parser.add_argument("-o", "--output", required=True,
+                        help="file to write the output to")
+    args = parser.parse_args(argv)
+    try:
+        run(args.script, args.output)
+    except RunError as error:
+        sys.exit(str(error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""Build and update ``docs/searchindex.js`` without running Sphinx.
+
+The search page of the book loads ``docs/searchindex.js``, a call to
+``Search.setIndex()`` with an index mapping each search *term* to the
+documents that contain it. This module builds that index directly from
+the pages in ``scripts/``: the reStructuredText pages as they are, and
+the chapter scripts through ``ptlp.extract``, so the index covers both
+the prose and the code of a chapter. Only the pages with an HTML page
+in ``docs/`` are indexed, since the search results link to it: a new
+chapter enters the index once the HTML of the book has been built
+with it.
+
+Terms are made the way ``docs/_static/searchtools.js`` makes them from
+a query: words are lower-cased, stop words and numbers are dropped and
+the rest are reduced with the Porter stemmer of
+``docs/_static/language_data.js``, ported below. Single characters,
+hyperlink targets and directive options are not indexed. As in the
+indexes of Sphinx, the words of the section titles are title terms
+only, so a page is not scored twice for them.
+
+The terms of each page and the hash of its source are kept in
+``.searchindex-cache.json``. When a page changes only its postings are
+removed from and added to the index; the other pages are not read.
+
+Usage::
+
+    python -m ptlp.search              # update the index of changed pages
+    python -m ptlp.search --rebuild    # index every page again
+"""
+
+import argparse
+import functools
+import html
+import json
+import os
+import re
+
+from ptlp import build, extract, manifest
+
+CACHE = ".searchindex-cache.json"
+
+# Bump when the way terms are made or the cache layout changes.
+VERSION = 2
+
+# From docs/_static/language_data.js.
+STOPWORDS = {
+    "a", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in",
+    "into", "is", "it", "near", "no", "not", "of", "on", "or", "such",
+    "that", "the", "their", "then", "there", "these", "they", "this", "to",
+    "was", "will", "with",
+}
+
+WORD_RE = re.compile(r"\w+")
+
+UNDERLINE_RE = re.compile(r"^([=\-~`^\"'*+#:._])\1*$")
+
+LITERAL_RE = re.compile(r"``(.+?)``")
+
+OPTION_RE = re.compile(r"^\s+:[\w-]+:")
+
+
+class Stemmer:
+    """The Porter stemmer used by the search page to stem queries."""
+
+    step2list = {
+        "ational": "ate", "tional": "tion", "enci": "ence", "anci": "ance",
+        "izer": "ize", "bli": "ble", "alli": "al", "entli": "ent",
+        "eli": "e", "ousli": "ous", "ization": "ize", "ation": "ate",
+        "ator": "ate", "alism": "al", "iveness": "ive", "fulness": "ful",
+        "ousness": "ous", "aliti": "al", "iviti": "ive", "biliti": "ble",
+        "logi": "log",
+    }
+
+    step3list = {
+        "icate": "ic", "ative": "", "alize": "al", "iciti": "ic",
+        "ical": "ic", "ful": "", "ness": "",
+    }
+
+    c = "[^aeiou]"          # consonant
+    v = "[aeiouy]"          # vowel
+    C = c + "[^aeiouy]*"    # consonant sequence
+    V = v + "[aeiou]*"      # vowel sequence
+
+    mgr0 = re.compile("^(" + C + ")?" + V + C)                    # m>0
+    meq1 = re.compile("^(" + C + ")?" + V + C + "(" + V + ")?$")  # m=1
+    mgr1 = re.compile("^(" + C + ")?" + V + C + V + C)            # m>1
+    s_v = re.compile("^(" + C + ")?" + v)                         # vowel in stem
+    cvc = re.compile("^" + C + v + "[^aeiouwxy]$")
+
+    step2 = re.compile("^(.+?)(" + "|".join(step2list) + ")$")
+    step3 = re.compile("^(.+?)(" + "|".join(step3list) + ")$")
+    step4 = re.compile("^(.+?)(al|ance|ence|er|ic|able|ible|ant|ement|ment"
+                       "|ent|ou|ism|ate|iti|ous|ive|ize)$")
+
+    def stem(self, w):
+        if len(w) < 3:
+            return w
+        firstch = w[0]
+        if firstch == "y":
+            w = "Y" + w[1:]
+
+        # Step 1a
+        if re.match(r"^(.+?)(ss|i)es$", w):
+            w = re.sub(r"^(.+?)(ss|i)es$", r"\1\2", w)
+        elif re.match(r"^(.+?)([^s])s$", w):
+            w = re.sub(r"^(.+?)([^s])s$", r"\1\2", w)
+
+        # Step 1b
+        match = re.match(r"^(.+?)eed$", w)
+        match2 = re.match(r"^(.+?)(ed|ing)$", w)
+        if match:
+            if self.mgr0.search(match.group(1)):
+                w = w[:-1]
+        elif match2:
+            stem = match2.group(1)
+            if self.s_v.search(stem):
+                w = stem
+                if re.search(r"(at|bl|iz)$", w):
+                    w = w + "e"
+                elif re.search(r"([^aeiouylsz])\1$", w):
+                    w = w[:-1]
+                elif self.cvc.search(w):
+                    w = w + "e"
+
+        # Step 1c
+        match = re.match(r"^(.+?)y$", w)
+        if match and self.s_v.search(match.group(1)):
+            w = match.group(1) + "i"
+
+        # Step 2
+        match = self.step2.match(w)
+        if match and self.mgr0.search(match.group(1)):
+            w = match.group(1) + self.step2list[match.group(2)]
+
+        # Step 3
+        match = self.step3.match(w)
+        if match and self.mgr0.search(match.group(1)):
+            w = match.group(1) + self.step3list[match.group(2)]
+
+        # Step 4
+        match = self.step4.match(w)
+        match2 = re.match(r"^(.+?)(s|t)(ion)$", w)
+        if match:
+            if self.mgr1.search(match.group(1)):
+                w = match.group(1)
+        elif match2:
+            stem = match2.group(1) + match2.group(2)
+            if self.mgr1.search(stem):
+                w = stem
+
+        # Step 5
+        match = re.match(r"^(.+?)e$", w)
+        if match:
+            stem = match.group(1)
+            if self.mgr1.search(stem) or (self.meq1.search(stem)
+                                          and not self.cvc.search(stem)):
+                w = stem
+        if w.endswith("ll") and self.mgr1.search(w):
+            w = w[:-1]
+
+        if firstch == "y":
+            w = "y" + w[1:]
+        return w
+
+
+stemmer = Stemmer()
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def term(word):
+    """Return the search term of ``word``, or None if it is not indexed."""
+    word = word.lower().strip("_")
+    if len(word) < 2 or word in STOPWORDS or word.isdigit():
+        return None
+    stem = stemmer.stem(word)
+    # The search page does not let the stemmer cut words to less than
+    # three characters.
+    if len(stem) < 3 and len(word) >= 3:
+        return word
+    return stem
+
+
+def terms(words):
+    """Return the set of search terms of the iterable ``words``."""
+    found = {term(word) for word in words}
+    found.discard(None)
+    return found
+
+
+def title_html(title):
+    """Return ``title`` as Sphinx renders it in the search results."""
+    parts = LITERAL_RE.split(title)
+    for index in range(1, len(parts), 2):
+        parts[index] = ('<code class="docutils literal notranslate">'
+                        '<span class="pre">{}</span></code>'
+                        .format(html.escape(parts[index])))
+    parts[::2] = [html.escape(part) for part in parts[::2]]
+    return "".join(parts)
+
+
+def text(line):
+    """Return the words of the rst ``line`` worth indexing."""
+    if line.startswith(".."):
+        # Only the argument of a directive, e.g. the heading of a
+        # rubric; not hyperlink targets or comments.
+        _, separator, argument = line.partition("::")
+        return argument if separator else ""
+    if OPTION_RE.match(line):
+        return ""
+    return line
+
+
+def index_page(lines):
+    """Return ``(title, terms, title terms)`` of the rst ``lines``.
+
+    Section titles are the lines underlined with punctuation. Their
+    words are title terms; all other words are terms, unless they are
+    title terms too.
+    """
+    title = None
+    words, title_words = set(), set()
+    previous = None
+    for line in lines:
+        line = line.rstrip("\n")
+        if (previous and not previous[0].isspace()
+                and UNDERLINE_RE.match(line)
+                and len(line) >= len(previous.rstrip())):
+            heading = previous.strip()
+            if title is None:
+                title = heading
+            title_words.update(WORD_RE.findall(heading))
+            previous = None
+            continue
+        if previous is not None:
+            words.update(WORD_RE.findall(text(previous)))
+        previous = line
+    if previous is not None:
+        words.update(WORD_RE.findall(text(previous)))
+    # Words repeat a lot, so they are stemmed once each.
+    found_titles = terms(title_words)
+    return title, terms(words) - found_titles, found_titles
+
+
+class Page:
+    """A page of the book: a chapter script or a reStructuredText page."""
+
+    def __init__(self, root, filename):
+        self.path = os.path.join(root, "scripts", filename)
+        self.name, extension = os.path.splitext(filename)
+        self.is_script = extension == ".py"
+
+    def lines(self, source):
+        if self.is_script:
+            return extract.script_to_rst(source)
+        return source
+
+
+def pages(root):
+    """Return the pages of ``root`` that have an HTML page in ``docs/``."""
+    scripts = os.path.join(root, "scripts")
+    docs = os.path.join(root, "docs")
+    return [Page(root, filename) for filename in sorted(os.listdir(scripts))
+            if filename.endswith((".py", ".rst")) and os.path.exists(
+                os.path.join(docs, os.path.splitext(filename)[0] + ".html"))]
+
+
+class SearchIndex:
+    """The search index of the book and the terms of each page in it."""
+
+    def __init__(self, path):
+        self.path = path
+        # The pages in the order of their numbers in the index.
+        self.docnames = []
+        self.numbers = {}
+        # Maps page names to their hash, title, terms and title terms.
+        self.docs = {}
+        # Map terms to the sets of numbers of the pages containing them.
+        self.terms = {}
+        self.titleterms = {}
+        try:
+            with open(path, encoding="utf-8") as source:
+                data = json.load(source)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != VERSION:
+            return
+        self.docnames = data["docnames"]
+        self.docs = data["docs"]
+        for number, name in enumerate(self.docnames):
+            self.numbers[name] = number
+            doc = self.docs[name]
+            for term in doc["terms"]:
+                self.terms.setdefault(term, set()).add(number)
+            for term in doc["titleterms"]:
+                self.titleterms.setdefault(term, set()).add(number)
+
+    def _post(self, postings, number, old, new):
+        for term in old - new:
+            documents = postings[term]
+            documents.discard(number)
+            if not documents:
+                del postings[term]
+        for term in new - old:
+            postings.setdefault(term, set()).add(number)
+
+    def update(self, page, force=False):
+        """Index ``page`` again if it changed, returning True if it did."""
+        key = manifest.combine(manifest.file_hash(page.path), str(VERSION))
+        doc = self.docs.get(page.name)
+        if doc is not None and doc["hash"] == key and not force:
+            return False
+        with open(page.path, encoding="utf-8") as source:
+            title, found, found_titles = index_page(page.lines(source))
+        if doc is None:
+            self.numbers[page.name] = len(self.docnames)
+            self.docnames.append(page.name)
+            doc = {"terms": [], "titleterms": []}
+        number = self.numbers[page.name]
+        self._post(self.terms, number, set(doc["terms"]), found)
+        self._post(self.titleterms, number, set(doc["titleterms"]),
+                   found_titles)
+        self.docs[page.name] = {
+            "hash": key,
+            "title": title_html(title or page.name),
+            "terms": sorted(found),
+            "titleterms": sorted(found_titles),
+        }
+        return True
+
+    def save(self):
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as target:
+            json.dump({"version": VERSION, "docnames": self.docnames,
+                       "docs": self.docs}, target, sort_keys=True)
+        os.replace(temporary, self.path)
+
+    def setindex(self):
+        """Return the data of the ``Search.setIndex()`` call."""
+        def postings(terms):
+            return {term: (min(documents) if len(documents) == 1
+                           else sorted(documents))
+                    for term, documents in sorted(terms.items())}
+        return {
+            "docnames": self.docnames,
+            "envversion": {},
+            "filenames": [name + ".rst" for name in self.docnames],
+            "objects": {},
+            "objnames": {},
+            "objtypes": {},
+            "terms": postings(self.terms),
+            "titles": [self.docs[name]["title"] for name in self.docnames],
+            "titleterms": postings(self.titleterms),
+        }
+
+    def write_js(self, path):
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as target:
+            target.write("Search.setIndex(")
+            json.dump(self.setindex(), target, separators=(",", ":"))
+            target.write(")")
+        os.replace(temporary, path)
+
+
+def update(root, rebuild=False):
+    """Bring the search index of ``root`` up to date with its pages.
+
+    Returns the ``SearchIndex`` and the names of the pages indexed.
+    """
+    cache = os.path.join(root, CACHE)
+    if rebuild and os.path.exists(cache):
+        os.remove(cache)
+    index = SearchIndex(cache)
+    page_list = pages(root)
+    names = {page.name for page in page_list}
+    if any(name not in names for name in index.docnames):
+        # Page numbers would shift, so a removed page means a rebuild.
+        os.remove(cache)
+        index = SearchIndex(cache)
+    updated = [page.name for page in page_list if index.update(page)]
+    js = os.path.join(root, "docs", "searchindex.js")
+    if updated or not os.path.exists(js):
+        index.write_js(js)
+        index.save()
+    return index, updated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.search",
+        description="Update docs/searchindex.js from the pages in scripts/.")
+    parser.add_argument("--root", default=build.ROOT,
+                        help="root of the book (default: %(default)s)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="index every page again")
+    args = parser.parse_args(argv)
+
+    _, updated = update(args.root, args.rebuild)
+    print("{} page(s) indexed{}".format(
+        len(updated), ": " + ", ".join(updated) if updated else ""))
+
+
+if __name__ == "__main__":
+    main()
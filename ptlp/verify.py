@@ -0,0 +1,190 @@
+"""Check that the committed output files match the chapter scripts.
+
+Each chapter script is run again and its standard output is compared,
+line by line as it is produced, with ``output/NAME.py.output``. The
+comparison stops at the first line that differs, the script is killed
+and the ``Example N:`` section of the output where the difference was
+found is reported. Neither output is ever held in memory as a whole.
+
+Some chapters print timings, which change from run to run. Their
+scripts contain the reStructuredText comment line::
+
+    # .. ptlp: output-varies
+
+and their output is compared with every number masked, and runs of
+spaces, which pad the columns of tables, reduced to one. The text,
+the tables and their rows must still be the same.
+
+Usage::
+
+    python -m ptlp.verify              # verify all chapters
+    python -m ptlp.verify minimal      # verify one chapter
+    python -m ptlp.verify -j 8         # use 8 worker processes
+"""
+
+import argparse
+import itertools
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from ptlp import build
+
+EXAMPLE_OUTPUT_RE = re.compile(rb"^Example (\d+):$")
+
+NUMBER_RE = re.compile(rb"-?\d[\d.,]*")
+
+SPACES_RE = re.compile(rb"[ \t]+")
+
+VARIES_MARKER = "# .. ptlp: output-varies"
+
+
+class Divergence:
+    """The first line where the output of a script differs."""
+
+    def __init__(self, line, example, expected, actual):
+        self.line = line
+        # The number of the example the line belongs to, or None if it
+        # comes before the first example.
+        self.example = example
+        # The lines without the newline, or None past the end of output.
+        self.expected = expected
+        self.actual = actual
+
+    def __str__(self):
+        def show(text):
+            if text is None:
+                return "end of output"
+            return repr(text.decode("utf-8", "replace"))
+        where = "line {}".format(self.line)
+        if self.example is not None:
+            where += " (Example {})".format(self.example)
+        return "{}: expected {}, got {}".format(
+            where, show(self.expected), show(self.actual))
+
+
+def mask(line):
+    """Return ``line`` with its numbers and column padding masked."""
+    return SPACES_RE.sub(b" ", NUMBER_RE.sub(b"#", line))
+
+
+def compare(expected_lines, actual_lines, normalize=None):
+    """Return the first ``Divergence`` of two iterables of lines, or None.
+
+    With ``normalize``, lines are equal when ``normalize`` returns the
+    same for both, e.g. ``mask``.
+    """
+    example = None
+    for line, (expected, actual) in enumerate(
+            itertools.zip_longest(expected_lines, actual_lines), 1):
+        if normalize is not None and None not in (expected, actual):
+            differs = normalize(expected) != normalize(actual)
+        else:
+            differs = expected != actual
+        if differs:
+            return Divergence(
+                line, example,
+                None if expected is None else expected.rstrip(b"\r\n"),
+                None if actual is None else actual.rstrip(b"\r\n"))
+        match = EXAMPLE_OUTPUT_RE.match(expected.rstrip(b"\r\n"))
+        if match:
+            example = int(match.group(1))
+    return None
+
+
+def output_varies(script):
+    """Return True if the output of ``script`` changes from run to run."""
+    with open(script, encoding="utf-8") as source:
+        return any(line.rstrip() == VARIES_MARKER for line in source)
+
+
+class Result:
+    """The outcome of verifying a chapter."""
+
+    def __init__(self, chapter, divergence=None, error=None, partial=False):
+        self.chapter = chapter
+        self.divergence = divergence
+        self.error = error
+        # True if the lines were compared with their numbers masked.
+        self.partial = partial
+
+    @property
+    def ok(self):
+        return self.divergence is None and self.error is None
+
+    def __str__(self):
+        if self.error is not None:
+            return "{}: ERROR: {}".format(self.chapter.name, self.error)
+        if self.divergence is not None:
+            return "{}: DIFFERS at {}".format(self.chapter.name, self.divergence)
+        if self.partial:
+            return "{}: ok (numbers masked)".format(self.chapter.name)
+        return "{}: ok".format(self.chapter.name)
+
+
+def verify_chapter(chapter):
+    """Run the script of ``chapter`` and compare it with its output file."""
+    try:
+        partial = output_varies(chapter.script)
+        expected = open(chapter.output, "rb")
+    except OSError as error:
+        return Result(chapter, error=error)
+    with expected, subprocess.Popen([sys.executable, chapter.script],
+                                    stdout=subprocess.PIPE,
+                                    cwd=chapter.root) as process:
+        divergence = compare(expected, process.stdout,
+                             mask if partial else None)
+        if divergence is not None:
+            process.kill()
+            return Result(chapter, divergence)
+    if process.returncode != 0:
+        return Result(chapter, error="{} exited with status {}".format(
+            chapter.script, process.returncode))
+    return Result(chapter, partial=partial)
+
+
+def verify(chapter_list, jobs=1, report=print):
+    """Verify ``chapter_list`` with ``jobs`` worker processes.
+
+    Results are reported as they finish and returned in the order of
+    ``chapter_list``.
+    """
+    results = [None] * len(chapter_list)
+    if jobs <= 1 or len(chapter_list) <= 1:
+        for index, chapter in enumerate(chapter_list):
+            results[index] = verify_chapter(chapter)
+            report(results[index])
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {pool.submit(verify_chapter, chapter): index
+                       for index, chapter in enumerate(chapter_list)}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+                report(results[futures[future]])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.verify",
+        description="Check the output files against the chapter scripts.")
+    parser.add_argument("names", nargs="*", metavar="chapter",
+                        help="chapter to verify, e.g. minimal (default: all)")
+    parser.add_argument("--root", default=build.ROOT,
+                        help="root of the book (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(),
+                        help="number of worker processes "
+                             "(default: number of CPUs, %(default)s)")
+    args = parser.parse_args(argv)
+
+    results = verify(build.chapters(args.root, args.names or None), args.jobs)
+    failed = sum(not result.ok for result in results)
+    print("{} chapter(s) verified, {} failed".format(len(results), failed))
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
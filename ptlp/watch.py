@@ -0,0 +1,203 @@
+"""Rebuild a chapter as soon as its script is saved.
+
+The watcher waits for changes to the files in ``scripts/``. When a
+chapter script is saved it rebuilds, for that chapter only:
+
++ ``output/NAME.py.output`` and ``rst/NAME.rst``, see ``ptlp.build``.
+  Scripts are forked from a warm interpreter when ``os.fork()`` is
+  available, see ``ptlp.forkserver``.
++ The postings of the page in ``docs/searchindex.js``, see
+  ``ptlp.search``.
+
+Saving a reStructuredText page of ``scripts/`` updates its postings
+only: the pages of ``rst/`` are edited by hand, e.g. ``rst/index.rst``
+lists the ``.rst`` documents where ``scripts/index.rst`` lists the
+scripts.
+
+The watcher does not build the HTML pages, as the repository has no
+Sphinx configuration. A Sphinx build writes its own
+``docs/searchindex.js``, so run ``python -m ptlp.search --rebuild``
+after it to restore the index of this module.
+
+Changes are detected with inotify on Linux and by polling the
+modification times of the files elsewhere. Editors often write a file
+in several steps, so a rebuild starts only when no change has been
+seen for a short *debounce* delay.
+
+Usage::
+
+    python -m ptlp.watch
+    python -m ptlp.watch --poll
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from ptlp import build, manifest, search
+
+EXTENSIONS = (".py", ".rst")
+
+# From <sys/inotify.h>.
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+
+EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Report the files written in a directory, using Linux inotify."""
+
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        # Raises AttributeError where the C library has no inotify.
+        self.fd = libc.inotify_init()
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init() failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch() failed")
+
+    def changes(self, timeout):
+        """Return the names of the files changed within ``timeout`` seconds."""
+        names = set()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return names
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            names.add(os.fsdecode(name))
+        return names
+
+
+class PollingWatcher:
+    """Report the files written in a directory by polling their mtimes."""
+
+    def __init__(self, directory, interval=0.2):
+        self.directory = directory
+        self.interval = interval
+        self.mtimes = self.scan()
+
+    def scan(self):
+        mtimes = {}
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                try:
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+                except FileNotFoundError:
+                    continue
+        return mtimes
+
+    def changes(self, timeout):
+        """Return the names of the files changed within ``timeout`` seconds."""
+        deadline = time.monotonic() + timeout
+        while True:
+            mtimes = self.scan()
+            names = {name for name, mtime in mtimes.items()
+                     if self.mtimes.get(name) != mtime}
+            self.mtimes = mtimes
+            remaining = deadline - time.monotonic()
+            if names or remaining <= 0:
+                return names
+            time.sleep(min(self.interval, remaining))
+
+
+def watcher(directory, polling=False):
+    """Return an inotify watcher for ``directory``, or a polling one."""
+    if not polling:
+        try:
+            return InotifyWatcher(directory)
+        except (AttributeError, OSError, TypeError):
+            pass
+    return PollingWatcher(directory)
+
+
+def wait(watch, debounce):
+    """Wait for changes to pages and return their names once they settle."""
+    names = set()
+    while not names:
+        names = {name for name in watch.changes(3600)
+                 if name.endswith(EXTENSIONS)}
+    while True:
+        more = watch.changes(debounce)
+        if not more:
+            return names
+        names.update(name for name in more if name.endswith(EXTENSIONS))
+
+
+class Rebuilder:
+    """Rebuild the artifacts of the pages of a book as they change."""
+
+    def __init__(self, root, runner):
+        self.root = root
+        self.runner = runner
+        self.cache = manifest.Manifest(os.path.join(root, build.MANIFEST))
+        # Catch up with changes made while nobody was watching, so the
+        # index written after a change covers every page.
+        self.index, _ = search.update(root)
+
+    def rebuild(self, filenames):
+        chapter_list = [build.Chapter(self.root, filename[:-len(".py")])
+                        for filename in sorted(filenames)
+                        if build.is_chapter(filename)]
+        chapter_list = [chapter for chapter in chapter_list
+                        if os.path.exists(chapter.script)]
+        if any(filename.endswith(".py") and not build.is_chapter(filename)
+               for filename in filenames):
+            # A module imported by chapters changed: the manifest knows
+            # which chapters import it.
+            chapter_list = build.chapters(self.root)
+        build.build(chapter_list, self.cache, runner=self.runner)
+        self.cache.save()
+
+        # Only the pages with an HTML page are in the index.
+        pages = [page for page in search.pages(self.root)
+                 if os.path.basename(page.path) in filenames]
+        if any([self.index.update(page) for page in pages]):
+            self.index.write_js(
+                os.path.join(self.root, "docs", "searchindex.js"))
+            self.index.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m ptlp.watch",
+        description="Rebuild chapters as soon as their scripts are saved.")
+    parser.add_argument("--root", default=build.ROOT,
+                        help="root of the book (default: %(default)s)")
+    parser.add_argument("--debounce", type=float, default=0.1,
+                        help="seconds without changes before rebuilding "
+                             "(default: %(default)s)")
+    parser.add_argument("--poll", action="store_true",
+                        help="poll for changes instead of using inotify")
+    args = parser.parse_args(argv)
+
+    runner = "fork" if hasattr(os, "fork") else "subprocess"
+    rebuilder = Rebuilder(args.root, runner)
+    watch = watcher(os.path.join(args.root, "scripts"), args.poll)
+    print("watching {} ({})".format(os.path.join(args.root, "scripts"),
+                                    type(watch).__name__))
+    try:
+        while True:
+            filenames = wait(watch, args.debounce)
+            start = time.perf_counter()
+            rebuilder.rebuild(filenames)
+            print("rebuilt {} in {:.3f}s".format(
+                ", ".join(sorted(filenames)), time.perf_counter() - start))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+# The timing function of ``perf_list_growth.py``, where it is
+# explained, for the other chapters that time code. They import it with
+# ``from _timing import seconds_per_call``. The name of this module
+# starts with an underscore, so it is not built as a chapter.
+
+import timeit
+
+TARGET = 0.02
+
+
+def seconds_per_call(function, *args):
+    timer = timeit.Timer(lambda: function(*args))
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= TARGET:
+            break
+        number *= 10
+    return min([seconds] + timer.repeat(repeat=2, number=number)) / number
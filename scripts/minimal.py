@@ -112,6 +112,8 @@ print('Example 1:')
 # This is line 1 of a multi-line comment.
 # This is line 2 of a multi-line comment.
 
+# .. ptlp: end-example
+
 # Another feature of a programming language you need to know from the
 # outset is how to define strings and how to print them to standard
 # output. This allows you to display messages for immediate feedback
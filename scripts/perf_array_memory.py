@@ -0,0 +1,265 @@
+# Compact sequences: the memory cost of lists
+# ===========================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# The script ``type_list.py`` describes a list as an ordered
+# collection of objects of any type. The price of that flexibility is
+# that a list does not hold its elements directly. It holds
+# *references* to them, and every element is a complete Python object
+# stored somewhere else in memory, with its type and reference count
+# next to its value. Wrapping a plain value in an object like this is
+# called *boxing*.
+
+# When every element has the same simple type, such as an integer or
+# a floating point number, the standard library offers sequences that
+# store the raw values side by side without boxing them:
+
+# + ``array.array``, a mutable sequence of numbers of one C type.
+# + ``bytes`` and ``bytearray``, an immutable and a mutable sequence
+#   of integers from 0 to 255.
+
+# This script builds the same data as a list and as these compact
+# sequences, measures how many bytes each element takes and times a
+# few common operations.
+
+# Two ways to measure memory
+# --------------------------
+
+# The function ``sys.getsizeof()`` returns the size in bytes of a
+# single object. For a list that is the size of the list object and of
+# its array of references, *not* of the elements the references point
+# to. A list of a thousand large integers has the same size as a list
+# of a thousand references to one small integer,
+
+print('Example 1:')
+
+import sys
+
+x = list(range(10 ** 6, 10 ** 6 + 1000))
+y = [0] * 1000
+
+# getsizeof() only counts the references
+print(sys.getsizeof(x), sys.getsizeof(y))
+
+# each integer is a separate object
+print(sys.getsizeof(x[0]))
+
+# The standard library module ``tracemalloc`` traces every memory
+# allocation made by the interpreter. The difference between the
+# memory traced before and after building some data is the memory
+# used by the data *and* all the objects it refers to. The following
+# function returns that difference for the data returned by
+# ``build(n)``. Tracing is only switched on while the data is built,
+# because it slows the interpreter down considerably. When something
+# else, such as ``ptlp.instrument``, is already tracing, the function
+# leaves tracing on,
+
+print('Example 2:')
+
+import tracemalloc
+
+
+def traced_bytes(build, n):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        data = build(n)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        if started:
+            tracemalloc.stop()
+    assert len(data) == n
+    return after - before
+
+
+# a list of a thousand distinct integers takes
+# far more memory than getsizeof() reports
+assert traced_bytes(lambda n: [10 ** 6 + item for item in range(n)],
+                    1000) > 2 * sys.getsizeof(x)
+
+# The same data in seven sequences
+# --------------------------------
+
+# The following functions build a sequence of ``n`` elements. There
+# are three kinds of data: integers too large to fit in a byte,
+# floating point numbers and integers from 0 to 255. Each kind is
+# built as a list and as a compact sequence. The *type code* ``'q'``
+# of ``array.array`` stores signed 64 bit integers and ``'d'`` stores
+# 64 bit floating point numbers, the same as the Python type
+# ``float``,
+
+print('Example 3:')
+
+from array import array
+
+
+def int_list(n):
+    return list(range(n))
+
+
+def int_array(n):
+    return array('q', range(n))
+
+
+def float_list(n):
+    return [float(item) for item in range(n)]
+
+
+def float_array(n):
+    return array('d', map(float, range(n)))
+
+
+def byte_list(n):
+    return [item % 256 for item in range(n)]
+
+
+def byte_bytes(n):
+    return bytes(item % 256 for item in range(n))
+
+
+def byte_bytearray(n):
+    return bytearray(item % 256 for item in range(n))
+
+
+BUILDERS = [int_list, int_array, float_list, float_array,
+            byte_list, byte_bytes, byte_bytearray]
+
+# confirm each pair of sequences has the same elements
+assert list(int_array(1000)) == int_list(1000)
+assert list(float_array(1000)) == float_list(1000)
+assert list(byte_bytes(1000)) == byte_list(1000)
+assert list(byte_bytearray(1000)) == byte_list(1000)
+
+# Bytes per element
+# -----------------
+
+# The sequences measured have ``SIZE`` elements, a hundred thousand,
+# enough for the fixed size of the sequence objects not to matter. You
+# can raise it to ten million if you have a few gigabytes of memory to
+# spare. The following table shows the bytes per element reported by
+# ``sys.getsizeof()`` and traced by ``tracemalloc``,
+
+print('Example 4:')
+
+SIZE = 10 ** 5
+
+print("{:<16} {:>12} {:>12}".format("sequence", "getsizeof", "tracemalloc"))
+traced = {}
+for build in BUILDERS:
+    traced[build] = traced_bytes(build, SIZE) / SIZE
+    print("{:<16} {:>12.1f} {:>12.1f}".format(
+        build.__name__, sys.getsizeof(build(SIZE)) / SIZE, traced[build]))
+
+# For the compact sequences both columns agree: 8 bytes for a 64 bit
+# number and 1 byte for a byte, because the sequence object holds all
+# the data. For the lists ``sys.getsizeof()`` reports the 8 bytes of a
+# reference per element, plus the spare room some lists keep to grow,
+# while ``tracemalloc`` also counts the integer and float objects,
+# about 30 and 24 bytes each.
+
+# The list of integers from 0 to 255 is the exception: the interpreter
+# creates the small integers from -5 to 256 once and reuses them, so
+# the list only pays for its references. It still takes eight times
+# the memory of the ``bytes`` object holding the same values.
+
+# What a hundred million elements take
+# ------------------------------------
+
+# Multiplying the traced bytes per element by a hundred million shows
+# why memory, not time, is usually the first limit of a program that
+# holds large amounts of numbers in lists,
+
+print('Example 5:')
+
+for build in BUILDERS:
+    print("{:<16} {:>8.1f} GB".format(build.__name__,
+                                      traced[build] * 10 ** 8 / 10 ** 9))
+
+# Iterating, summing and slicing
+# ------------------------------
+
+# The following functions iterate over all the elements of a
+# sequence, add them up with ``sum()`` and copy its first half with a
+# slice,
+
+print('Example 6:')
+
+
+def iterate(x):
+    for item in x:
+        pass
+
+
+def add(x):
+    return sum(x)
+
+
+def half(x):
+    return x[:len(x) // 2]
+
+
+OPERATIONS = [iterate, add, half]
+
+# The following table shows the time in nanoseconds per element of
+# each operation on each sequence,
+
+print('Example 7:')
+
+from _timing import seconds_per_call
+
+print("{:<16}".format("ns per element") +
+      "".join("{:>10}".format(operation.__name__)
+              for operation in OPERATIONS))
+for build in BUILDERS:
+    data = build(SIZE)
+    row = "{:<16}".format(build.__name__)
+    for operation in OPERATIONS:
+        row += "{:>10.2f}".format(
+            seconds_per_call(operation, data) / SIZE * 1e9)
+    print(row)
+
+# Compact sequences are smaller but not always faster. Every element
+# read from an ``array`` or ``bytes`` object while iterating or
+# summing has to be boxed into a new integer or float object, which
+# takes time, while a list hands out the objects it already refers to.
+# Slicing is the opposite case: slicing a compact sequence copies raw
+# values, and slicing a list copies references *and* increments the
+# reference count of every element.
+
+# Conclusions
+# -----------
+
+# + A list of numbers takes four to five times the memory of the
+#   numbers themselves, because every element is a separate object
+#   and the list stores a reference to it.
+
+# + ``sys.getsizeof()`` only reports the size of the list and its
+#   references. Use ``tracemalloc`` to measure the memory of a list
+#   and its elements.
+
+# + ``array.array``, ``bytes`` and ``bytearray`` store raw values and
+#   take the memory of the values only. Use them for large amounts of
+#   numbers of one type, keeping in mind that reading their elements
+#   one at a time is not faster than reading those of a list.
+
+# References
+# ----------
+
+# + `array (SL)`_
+# + `tracemalloc (SL)`_
+# + `sys.getsizeof (SL)`_
+
+# .. _array (SL): https://docs.python.org/3.7/library/array.html
+# .. _tracemalloc (SL): https://docs.python.org/3.7/library/tracemalloc.html
+# .. _sys.getsizeof (SL): https://docs.python.org/3.7/library/sys.html#sys.getsizeof
@@ -0,0 +1,399 @@
+# Writing many lines: print, write and buffers
+# ============================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Examples 4 to 6 of ``minimal.py`` use the function ``print()`` with
+# the keyword arguments ``sep`` and ``end``, and every script of the
+# book writes its results one ``print()`` call at a time. That is the
+# right choice for a few lines, but a program writing a report of a
+# million lines pays the cost of a ``print()`` call for every line:
+# converting every argument to a string, writing the separators and
+# the end of line one at a time, and, when the output is *line
+# buffered*, a call to the operating system for every line.
+
+# This script measures how many lines per second ``print()``, the
+# method ``write()`` of a file and a small class writing lines in
+# batches achieve, when the output goes to a pipe, to a file and to
+# the null device ``/dev/null``, which throws away whatever is written
+# to it. The measurements depend on the operating system as much as on
+# Python.
+
+# Buffers
+# -------
+
+# A file opened with ``open()`` in text mode is a stack of three
+# objects. The text layer encodes the strings into bytes, the buffer
+# layer collects the bytes in a block of memory, and the raw layer
+# passes the block to the operating system when it is full, with one
+# *system call*. A system call is much slower than a function call, so
+# the buffer saves most of the time of writing small pieces. The
+# keyword argument ``buffering`` of ``open()`` sets the size of the
+# buffer in bytes, and ``buffering=1`` makes the file line buffered:
+# the buffer is passed to the operating system at every end of line.
+
+# ``sys.stdout`` is line buffered when it writes to a terminal, so the
+# lines appear as soon as they are printed, and block buffered when it
+# is redirected to a file or a pipe. Running Python with the option
+# ``-u``, or with the environment variable ``PYTHONUNBUFFERED`` set,
+# turns the buffering off altogether,
+
+print('Example 1:')
+
+import io
+import sys
+
+print(isinstance(sys.stdout, io.TextIOWrapper), io.DEFAULT_BUFFER_SIZE)
+
+# Writing in batches
+# ------------------
+
+# The following class has a method ``print()`` taking the same
+# arguments as the function ``print()``, which formats each line with
+# the method ``join()`` of the separator, and a method ``write()``
+# taking a line already formatted. Both collect the lines in a list,
+# and once ``batch`` lines have been collected the list is joined and
+# written with a single call to the method ``write()`` of the stream.
+# The lines left are written when the ``with`` statement ends.
+
+# The stream is ``sys.stdout`` unless another one is given. With
+# ``buffer_size``, the lines go instead to a new stream writing to the
+# file descriptor of ``sys.stdout``, the number the operating system
+# gives to an open file, with a buffer of ``buffer_size`` bytes. That
+# stream is block buffered even when ``sys.stdout`` is line buffered.
+# The module ``ptlp/bulk.py`` of the tools building this book has the
+# same class, with docstrings, for programs that can import it,
+
+print('Example 2:')
+
+
+class BulkWriter:
+
+    def __init__(self, stream=None, batch=1000, buffer_size=None):
+        self.batch = batch
+        self._lines = []
+        self._own_stream = False
+        if stream is None and buffer_size is not None:
+            try:
+                fileno = sys.stdout.fileno()
+            except (AttributeError, OSError):
+                # io.UnsupportedOperation is an OSError.
+                fileno = None
+            if fileno is not None:
+                # Anything already printed must come out first.
+                sys.stdout.flush()
+                stream = open(fileno, "w", buffering=buffer_size,
+                              encoding=sys.stdout.encoding, closefd=False)
+                self._own_stream = True
+        self.stream = sys.stdout if stream is None else stream
+
+    def print(self, *values, sep=" ", end="\n"):
+        self._lines.append(sep.join(map(str, values)) + end)
+        if len(self._lines) >= self.batch:
+            self._write()
+
+    def write(self, text):
+        self._lines.append(text)
+        if len(self._lines) >= self.batch:
+            self._write()
+
+    def _write(self):
+        if self._lines:
+            self.stream.write("".join(self._lines))
+            self._lines.clear()
+
+    def flush(self):
+        self._write()
+        self.stream.flush()
+
+    def close(self):
+        self.flush()
+        if self._own_stream:
+            self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+out = io.StringIO()
+with BulkWriter(out) as writer:
+    writer.print("a", 1, sep=", ", end=".\n")
+    writer.print("b", 2)
+    writer.write("c 3\n")
+assert out.getvalue() == "a, 1.\nb 2\nc 3\n"
+
+# Five ways to write the lines
+# ----------------------------
+
+# Each of the following functions writes a list of rows to a stream,
+# one line per row:
+
+# + ``print_each()`` calls ``print()`` with the argument ``file``.
+# + ``write_each()`` formats each line with the method ``format()`` and
+#   calls the method ``write()`` of the stream.
+# + ``print_bulk()`` calls the method ``print()`` of ``BulkWriter``.
+# + ``write_bulk()`` formats each line like ``write_each()`` and calls
+#   the method ``write()`` of ``BulkWriter``.
+# + ``write_joined()`` formats all the lines, joins them and writes the
+#   whole text at once, which needs memory for the whole text.
+
+print('Example 3:')
+
+
+def print_each(stream, rows):
+    for row in rows:
+        print(*row, file=stream)
+
+
+def write_each(stream, rows):
+    for row in rows:
+        stream.write("{} {} {}\n".format(*row))
+
+
+def print_bulk(stream, rows):
+    with BulkWriter(stream) as writer:
+        for row in rows:
+            writer.print(*row)
+
+
+def write_bulk(stream, rows):
+    with BulkWriter(stream) as writer:
+        for row in rows:
+            writer.write("{} {} {}\n".format(*row))
+
+
+def write_joined(stream, rows):
+    stream.write("".join("{} {} {}\n".format(*row) for row in rows))
+
+
+WRITERS = [print_each, write_each, print_bulk, write_bulk, write_joined]
+
+# The rows are like the rows of a report, a number, a name and a
+# count. The following example confirms the five functions write the
+# same text,
+
+print('Example 4:')
+
+
+def make_rows(n):
+    return [(number, "item{}".format(number), number % 97)
+            for number in range(n)]
+
+
+rows = make_rows(1000)
+texts = []
+for write in WRITERS:
+    out = io.StringIO()
+    write(out, rows)
+    texts.append(out.getvalue())
+assert texts.count(texts[0]) == len(texts)
+print(repr(texts[0][:30]))
+
+# Destinations
+# ------------
+
+# The following function opens a stream writing to one of three
+# destinations, with a buffer of ``buffering`` bytes:
+
+# + ``"pipe"``, a *pipe*, a channel between two programs, like the
+#   output of a program piped to another one in a shell. The other
+#   program is a second Python interpreter that reads everything
+#   written to the pipe and throws it away.
+# + ``"file"``, a temporary file on disk.
+# + ``"null"``, the null device, which measures the cost of Python
+#   alone, as the operating system does nothing with the bytes.
+
+# The pipe and the file are created once, and the stream writing to
+# the pipe does not close it. The file is emptied every time it is
+# opened, so it does not grow while the lines are timed,
+
+print('Example 5:')
+
+import os
+import subprocess
+import tempfile
+
+DRAIN = "import sys\nwhile sys.stdin.buffer.read1(1 << 16):\n    pass"
+reader = subprocess.Popen([sys.executable, "-c", DRAIN],
+                          stdin=subprocess.PIPE)
+
+directory = tempfile.TemporaryDirectory()
+PATHS = {"file": os.path.join(directory.name, "lines.txt"),
+         "null": os.devnull}
+DESTINATIONS = ["pipe", "file", "null"]
+
+
+def open_stream(destination, buffering):
+    if destination == "pipe":
+        return open(reader.stdin.fileno(), "w", buffering=buffering,
+                    encoding="utf-8", closefd=False)
+    return open(PATHS[destination], "w", buffering=buffering,
+                encoding="utf-8")
+
+
+def write_to(destination, buffering, write, rows):
+    with open_stream(destination, buffering) as stream:
+        write(stream, rows)
+
+
+write_to("file", -1, write_bulk, rows)
+with open(PATHS["file"], encoding="utf-8") as stream:
+    assert stream.read() == texts[0]
+
+# ``buffering=-1`` is the default of ``open()``, a buffer of
+# ``io.DEFAULT_BUFFER_SIZE`` bytes, 8192 on most computers.
+
+# Lines per second
+# ----------------
+
+# Every function writes ``LINES`` rows. You can raise the number, the
+# lines per second hardly change. The following table shows, in
+# thousands of lines per second, each way of writing with the default
+# buffer,
+
+print('Example 6:')
+
+from _timing import seconds_per_call
+
+LINES = 5 * 10 ** 4
+rows = make_rows(LINES)
+
+
+def table(buffering, writers):
+    print("{:<16}".format("klines/s") +
+          "".join("{:>10}".format(name) for name in DESTINATIONS))
+    for write in writers:
+        row = "{:<16}".format(write.__name__)
+        for destination in DESTINATIONS:
+            seconds = seconds_per_call(write_to, destination, buffering,
+                                       write, rows)
+            row += "{:>10,.0f}".format(LINES / seconds / 1000)
+        print(row)
+
+
+table(-1, WRITERS)
+
+# With the default buffer the destination hardly matters, because the
+# buffer is passed to the operating system only once every few hundred
+# lines: most of the time is spent in Python, formatting the lines.
+# ``write_each()`` is usually two to three times faster than
+# ``print_each()``, as ``print()`` converts and writes each argument
+# and separator separately. Collecting the lines in batches gains
+# nothing reliable here, as the buffer of the stream already collects
+# them: from one run to the next, ``print_bulk()`` comes out faster or
+# slower than ``print_each()``, and ``write_bulk()`` and
+# ``write_joined()`` faster or slower than ``write_each()``, as joining
+# the lines copies them once more. The numbers change by as much as
+# 40% between runs, so only larger differences mean anything.
+
+# A larger buffer
+# ---------------
+
+# A buffer of a megabyte, ``buffering=1 << 20``, makes fewer system
+# calls. The following table shows the measurements of three of the
+# functions with it,
+
+print('Example 7:')
+
+LARGE_BUFFER = 1 << 20
+table(LARGE_BUFFER, [print_each, write_each, write_bulk])
+
+# Once the buffer is a few kilobytes, the system calls are only a
+# small part of the time, so a larger buffer gains little more.
+
+# Line buffering
+# --------------
+
+# The following table shows the same measurements with a line buffered
+# stream, ``buffering=1``, like ``sys.stdout`` writing to a terminal,
+
+print('Example 8:')
+
+table(1, [print_each, write_each, print_bulk, write_bulk])
+
+# Now ``print_each()`` and ``write_each()`` make a system call for
+# every line, and their throughput drops to a fraction, most of all
+# when the bytes go through a pipe to another program. The two
+# functions using ``BulkWriter`` make a system call per thousand lines,
+# so they keep most of their speed: a batch of lines costs a single
+# system call whatever the buffering.
+
+# ``BulkWriter(buffer_size=...)`` turns the line buffering of
+# ``sys.stdout`` into block buffering without changing ``sys.stdout``
+# itself. The following function writes the rows with such a writer
+# and a buffer of ``LARGE_BUFFER`` bytes, while the line buffered
+# stream it is given stands in for ``sys.stdout``. The table compares
+# it with ``write_bulk()`` writing to the same line buffered stream,
+
+print('Example 9:')
+
+
+def bulk_buffered(stream, rows):
+    saved = sys.stdout
+    sys.stdout = stream
+    try:
+        with BulkWriter(buffer_size=LARGE_BUFFER) as writer:
+            for row in rows:
+                writer.write("{} {} {}\n".format(*row))
+    finally:
+        sys.stdout = saved
+
+
+write_to("file", 1, bulk_buffered, make_rows(1000))
+with open(PATHS["file"], encoding="utf-8") as stream:
+    assert stream.read() == texts[0]
+table(1, [write_bulk, bulk_buffered])
+
+# The two are about as fast, within the noise of the measurements.
+# With batches of a thousand lines, a line buffered stream already
+# makes only one system call per batch, a small part of the time, so
+# a buffer of its own saves ``BulkWriter`` little more.
+
+# The following example closes the pipe, which ends the program reading
+# it, and removes the temporary directory,
+
+print('Example 10:')
+
+reader.stdin.close()
+assert reader.wait() == 0
+directory.cleanup()
+
+# Conclusions
+# -----------
+
+# + ``print()`` is convenient but it is the slowest way to write many
+#   lines. Formatting each line and calling the method ``write()`` of
+#   the stream is two to three times faster.
+
+# + Collecting the lines and writing them in batches, as
+#   ``BulkWriter`` does, keeps the output fast when the stream is line
+#   buffered, such as ``sys.stdout`` on a terminal or in a program run
+#   with ``python -u``. On a block buffered stream it gains nothing
+#   and can be slower.
+
+# + The default buffer is already large enough for the cost of the
+#   system calls to be small. A larger one helps little.
+
+# References
+# ----------
+
+# + `print (SL)`_
+# + `open (SL)`_
+# + `io (SL)`_
+# + `-u (Python Setup and Usage)`_
+
+# .. _print (SL): https://docs.python.org/3.7/library/functions.html#print
+# .. _open (SL): https://docs.python.org/3.7/library/functions.html#open
+# .. _io (SL): https://docs.python.org/3.7/library/io.html
+# .. _-u (Python Setup and Usage): https://docs.python.org/3.7/using/cmdline.html#cmdoption-u
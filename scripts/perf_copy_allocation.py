@@ -0,0 +1,252 @@
+# Copies and in-place changes: tracing allocations
+# ================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Examples 52 and 54 of ``type_list.py`` use the function ``id()`` to
+# show that ``x += ["b", "c"]`` changes the list bound to ``x`` *in
+# place*, while ``x = x + ["b", "c"]`` creates a new list and binds
+# ``x`` to it. Example 25 creates a copy of a list with the slice
+# ``y[:]``. Whether an operation creates a new list matters for more
+# than identity: every new list needs memory for its references, and
+# the old list is only released when nothing refers to it any more.
+
+# This script uses the standard library module ``tracemalloc`` to
+# measure how many bytes each operation allocates and frees. The
+# measurements are printed in the output of the script,
+# ``perf_copy_allocation.py.output``. They hardly change from run to
+# run, but they depend on the version of Python and the computer the
+# book is built on.
+
+# Snapshots of memory
+# -------------------
+
+# Once ``tracemalloc.start()`` has been called, the interpreter
+# records every block of memory it allocates, together with the file
+# and line of code that allocated it, until the block is freed. The
+# function ``tracemalloc.take_snapshot()`` returns the blocks allocated
+# at that moment, and the method ``compare_to()`` of a snapshot
+# returns, for every file or line, the difference in bytes with an
+# earlier snapshot. A positive difference is memory allocated between
+# the two snapshots, and a negative one is memory freed.
+
+# The following function runs the code ``setup``, takes a snapshot,
+# runs the code ``operation`` and takes a second snapshot. The code is
+# compiled with the file names ``<setup>`` and ``<operation>``, and the
+# snapshots are *filtered* to keep only the blocks allocated by these
+# two, so that the memory used by ``tracemalloc`` itself is not
+# counted. The function returns the bytes allocated and freed by the
+# operation and whether ``x`` is still bound to the same object. It
+# leaves tracing on when something else, such as ``ptlp.instrument``,
+# is already tracing,
+
+print('Example 1:')
+
+import tracemalloc
+
+FILTERS = [tracemalloc.Filter(True, "<setup>"),
+           tracemalloc.Filter(True, "<operation>")]
+
+
+def allocations(setup, operation):
+    namespace = {}
+    code = compile(operation, "<operation>", "exec")
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        exec(compile(setup, "<setup>", "exec"), namespace)
+        idx = id(namespace["x"])
+        before = tracemalloc.take_snapshot().filter_traces(FILTERS)
+        exec(code, namespace)
+        after = tracemalloc.take_snapshot().filter_traces(FILTERS)
+    finally:
+        if started:
+            tracemalloc.stop()
+    differences = [statistic.size_diff
+                   for statistic in after.compare_to(before, "filename")]
+    allocated = sum(size for size in differences if size > 0)
+    freed = -sum(size for size in differences if size < 0)
+    return allocated, freed, id(namespace["x"]) == idx
+
+
+# creating a list of a thousand integers
+# allocates memory and frees none
+allocated, freed, same = allocations("x = None", "x = list(range(1000))")
+print(allocated, freed)
+assert allocated > 0 and freed == 0
+
+# The blocks are only traced from the moment ``tracemalloc.start()`` is
+# called, so the lists the operation works on must be created by
+# ``setup``, or the memory they free would not be seen.
+
+# Peak memory
+# -----------
+
+# Comparing snapshots shows the memory held before and after an
+# operation, but not memory allocated and freed *during* the
+# operation, such as a temporary list. The function
+# ``tracemalloc.get_traced_memory()`` returns the memory traced now
+# and its *peak*, the most memory traced at any one time since the
+# function ``tracemalloc.reset_peak()``, new in Python 3.9, was
+# called. The following function returns how far above its starting
+# point the memory rose while ``operation`` ran. The code running
+# ``exec()`` itself takes a little memory, so the peak of an operation
+# doing nothing is subtracted,
+
+print('Example 2:')
+
+
+def peak(setup, operation):
+    namespace = {}
+    code = compile(operation, "<operation>", "exec")
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        exec(compile(setup, "<setup>", "exec"), namespace)
+        tracemalloc.reset_peak()
+        start = tracemalloc.get_traced_memory()[0]
+        exec(code, namespace)
+        return tracemalloc.get_traced_memory()[1] - start
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def extra_peak(setup, operation):
+    return max(0, peak(setup, operation) - peak(setup, "pass"))
+
+
+# a temporary list of a thousand integers
+# raises the peak but is freed at once
+allocated, freed, same = allocations("x = None", "len(list(range(1000)))")
+assert allocated == 0 and freed == 0
+assert extra_peak("x = None", "len(list(range(1000)))") > 8000
+
+# Copying and changing a list
+# ---------------------------
+
+# Every operation below starts from a list ``y`` of ``N`` integers and
+# a copy ``x`` of it. The integers are created by the setup, so the
+# table shows the memory of the lists alone: a list stores one
+# reference of 8 bytes for every element, and copying a list copies
+# the references, not the integers they refer to. The operations are:
+
+# + The copies of Example 25 of ``type_list.py`` and of the
+#   constructor ``list()``.
+# + Concatenation with ``+`` and repetition with ``*``, which create a
+#   new list, as in Example 54.
+# + Assignment with addition ``+=``, Example 52, repetition in place
+#   ``*=``, the method ``extend()`` and assignment to the slice of the
+#   whole list, which change ``x`` in place.
+
+print('Example 3:')
+
+N = 1000
+
+SETUP = """
+y = list(range({}))
+x = y[:]
+""".format(N)
+
+OPERATIONS = [
+    "x = y[:]",
+    "x = list(y)",
+    "x = x + y",
+    "x = x * 2",
+    "x += y",
+    "x *= 2",
+    "x.extend(y)",
+    "x[:] = y",
+]
+
+# The following table shows, for each operation, the bytes allocated
+# and freed, the extra peak memory during the operation and whether
+# ``x`` is still bound to the same list,
+
+print('Example 4:')
+
+print("{:<14} {:>10} {:>10} {:>10}  {}".format(
+    "operation", "allocated", "freed", "peak", "same list"))
+for operation in OPERATIONS:
+    allocated, freed, same = allocations(SETUP, operation)
+    print("{:<14} {:>10,} {:>10,} {:>10,}  {}".format(
+        operation, allocated, freed, extra_peak(SETUP, operation), same))
+
+# The copies allocate the ``N`` references of the new list, and free
+# those of the list ``x`` was bound to before. The list objects
+# themselves, 56 bytes each, often do not show: the interpreter keeps
+# a few freed list objects to reuse them.
+
+# Concatenation and repetition allocate a list of twice ``N``
+# references, and for a while both the new and the old list of ``x``
+# exist, so the peak is the size of the new list.
+
+# The in-place operations keep ``x`` bound to the same list, but they
+# still have to make room for the new references. The list asks for a
+# larger block of memory, and the block of ``N`` references is freed,
+# so they allocate and free as much as concatenation. The difference
+# is the peak: the block is resized with a single request to the
+# memory allocator, so the traced memory only rises by the ``N``
+# references added.
+
+# Assignment to the whole slice, ``x[:] = y``, allocates and frees
+# nothing in the end, as the list keeps the same length, but it does
+# need a temporary block to hold the old references while they are
+# replaced.
+
+# Growing one element at a time
+# -----------------------------
+
+# The difference between ``+=`` and ``+`` grows when they are used
+# repeatedly. When ``+=`` has to enlarge a list it adds some spare
+# room, like ``append()``, so the following additions do not need to
+# allocate anything. ``+`` allocates a complete new list every time.
+# The following example adds one element to ``x`` twice. The setup
+# does the first addition with ``+=``, and the table shows the
+# second one,
+
+print('Example 5:')
+
+for operation in ["x += [1]", "x = x + [1]"]:
+    allocated, freed, same = allocations(SETUP + "x += [0]\n", operation)
+    print("{:<14} {:>10,} {:>10,}  {}".format(operation, allocated, freed,
+                                             same))
+
+# The second ``+=`` fits in the spare room left by the first, so it
+# allocates nothing. In a loop adding one element at a time this makes
+# a list of ``n`` elements cost about ``n`` copied references in
+# total, while ``x = x + [item]`` copies the whole list every time, as
+# measured in ``perf_list_growth.py``.
+
+# Conclusions
+# -----------
+
+# + Slicing, ``list()``, ``+`` and ``*`` always allocate a new list,
+#   8 bytes for every reference. The elements themselves are not
+#   copied.
+
+# + ``+=``, ``*=`` and ``extend()`` keep the same list, but may still
+#   allocate a larger block for its references. Their advantage is the
+#   spare room they keep for the next additions and a lower peak.
+
+# + ``tracemalloc`` snapshots show the memory held after an operation,
+#   and the peak shows the temporary memory needed while it runs.
+
+# References
+# ----------
+
+# + `tracemalloc (SL)`_
+# + `Shallow and deep copy operations (SL)`_
+
+# .. _tracemalloc (SL): https://docs.python.org/3.9/library/tracemalloc.html
+# .. _Shallow and deep copy operations (SL): https://docs.python.org/3.7/library/copy.html
@@ -0,0 +1,267 @@
+# Queues: lists versus deques
+# ===========================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# A *queue* holds jobs waiting to be processed. New jobs are added at
+# one end, and the next job to process is taken either from the other
+# end, *first in, first out* (FIFO), or from the same end, *last in,
+# first out* (LIFO). A LIFO queue is also called a *stack*.
+
+# A list can do both. Jobs are added with ``append()``, and taken with
+# ``pop(0)`` for a FIFO queue or ``pop()`` for a LIFO queue. The
+# script ``type_list.py`` shows the methods ``insert()`` and ``pop()``
+# used at the start of a list in Examples 55 and 66. What it does not
+# show is their cost: the elements of a list are stored one after the
+# other, so inserting or removing the *first* element moves every
+# other element by one place. The longer the list, the longer it
+# takes.
+
+# The ``deque`` type of the standard library module ``collections``, a
+# *double-ended queue* pronounced "deck", adds and removes elements at
+# either end in constant time. This script runs the same queue
+# simulation on lists and on deques and measures how many jobs per
+# second each can process.
+
+# The deque type
+# --------------
+
+# A deque is created from an iterable like a list, and has the methods
+# ``append()`` and ``pop()`` of a list for the right end, plus
+# ``appendleft()`` and ``popleft()`` for the left end,
+
+print('Example 1:')
+
+from collections import deque
+
+x = deque([2, 3])
+x.append(4)
+x.appendleft(1)
+print(x)
+
+# take the first and the last element
+assert x.popleft() == 1
+assert x.pop() == 4
+assert list(x) == [2, 3]
+
+# The queue simulation
+# --------------------
+
+# The following functions simulate ``steps`` steps of a busy queue: on
+# every step a new job is added and the next job is taken and
+# processed. The queue starts with ``n`` jobs waiting and, as one job
+# is added and one taken on every step, it keeps ``n`` jobs waiting.
+# Processing a job is reduced to adding it to a list of processed
+# jobs, so the simulation measures the queue alone,
+
+print('Example 2:')
+
+
+def fifo_list(queue, steps, processed):
+    for job in range(steps):
+        queue.append(job)
+        processed.append(queue.pop(0))
+
+
+def lifo_list(queue, steps, processed):
+    for job in range(steps):
+        queue.append(job)
+        processed.append(queue.pop())
+
+
+def fifo_deque(queue, steps, processed):
+    for job in range(steps):
+        queue.append(job)
+        processed.append(queue.popleft())
+
+
+def lifo_deque(queue, steps, processed):
+    for job in range(steps):
+        queue.append(job)
+        processed.append(queue.pop())
+
+
+# Before timing the simulations it is worth confirming that the list
+# and deque versions process the jobs in the same order. With three
+# jobs waiting, a FIFO queue processes the waiting jobs first, and a
+# LIFO queue processes every new job straight away,
+
+print('Example 3:')
+
+for simulate_list, simulate_deque in [(fifo_list, fifo_deque),
+                                      (lifo_list, lifo_deque)]:
+    x = ["a", "b", "c"]
+    y = deque(["a", "b", "c"])
+    processed_list = []
+    processed_deque = []
+    simulate_list(x, 5, processed_list)
+    simulate_deque(y, 5, processed_deque)
+    assert processed_list == processed_deque
+    assert x == list(y)
+    print(simulate_list.__name__, processed_list)
+
+# Ring buffers
+# ------------
+
+# A queue that keeps only the most recent jobs, for example the last
+# hundred lines of a log, is called a *ring buffer*. A deque created
+# with the argument ``maxlen`` is a ring buffer: once it holds
+# ``maxlen`` elements, appending an element at one end discards an
+# element at the other end,
+
+print('Example 4:')
+
+x = deque([1, 2, 3], maxlen=3)
+x.append(4)
+print(x)
+assert list(x) == [2, 3, 4]
+
+# With a list, the oldest element has to be removed explicitly, which
+# moves all the other elements. The following functions add ``steps``
+# jobs to a ring buffer holding ``n`` jobs,
+
+print('Example 5:')
+
+
+def ring_list(queue, steps, processed):
+    for job in range(steps):
+        queue.append(job)
+        del queue[0]
+
+
+def ring_deque(queue, steps, processed):
+    for job in range(steps):
+        queue.append(job)
+
+
+x = [1, 2, 3]
+ring_list(x, 1, [])
+y = deque([1, 2, 3], maxlen=3)
+ring_deque(y, 1, [])
+assert x == list(y) == [2, 3, 0]
+
+# Jobs per second
+# ---------------
+
+# The number of jobs waiting goes from a thousand up to ten to the
+# power ``MAX_EXPONENT``. You can raise it to 7 to have ten million
+# jobs waiting, but be prepared to wait too. Every call of a
+# simulation runs ``STEPS`` steps,
+
+print('Example 6:')
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(3, MAX_EXPONENT + 1)]
+STEPS = 1000
+print(SIZES)
+
+# The following table shows, for each simulation, the thousands of
+# jobs processed per second with the number of jobs waiting at the
+# top of the column. The queues keep their length on every step, so
+# they are created once for each size and reused by all the calls.
+# Every call starts a new list of processed jobs,
+
+print('Example 7:')
+
+from _timing import seconds_per_call
+
+SIMULATIONS = [
+    (fifo_list, list),
+    (lifo_list, list),
+    (fifo_deque, deque),
+    (lifo_deque, deque),
+    (ring_list, list),
+    (ring_deque, lambda jobs: deque(jobs, maxlen=len(jobs))),
+]
+
+
+def run(simulate, queue):
+    processed = []
+    simulate(queue, STEPS, processed)
+
+
+print("{:<14}".format("1000 jobs/s") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for simulate, make in SIMULATIONS:
+    row = "{:<14}".format(simulate.__name__)
+    for n in SIZES:
+        queue = make(range(n))
+        seconds = seconds_per_call(run, simulate, queue)
+        assert len(queue) == n
+        row += "{:>12,.0f}".format(STEPS / seconds / 1000)
+    print(row)
+
+# The rows of the deques, and the LIFO row of the list, stay roughly
+# flat: the cost of a step does not depend on the number of jobs
+# waiting. The rows of the FIFO queue and the ring buffer built on a
+# list fall about tenfold from one column to the next, because every
+# ``pop(0)`` or ``del queue[0]`` moves all the jobs waiting.
+
+# Draining a queue
+# ----------------
+
+# A batch job often fills a queue with all its work first and then
+# processes it until the queue is empty. Taking ``n`` jobs from the
+# front of a list moves ``n - 1`` elements for the first job, ``n -
+# 2`` for the second and so on, about ``n * n / 2`` moves in total.
+# This is *quadratic* time: twice the jobs take four times longer. The
+# following table shows the time in milliseconds to drain a queue of
+# ``n`` jobs, doubling ``n`` from one column to the next. The queue is
+# built inside the timed function, which takes the same time for both
+# types,
+
+print('Example 8:')
+
+
+def drain_list(n):
+    queue = list(range(n))
+    while queue:
+        queue.pop(0)
+
+
+def drain_deque(n):
+    queue = deque(range(n))
+    while queue:
+        queue.popleft()
+
+
+DRAIN_SIZES = [1000 * 2 ** exponent for exponent in range(5)]
+
+print("{:<14}".format("ms") +
+      "".join("{:>9,}".format(n) for n in DRAIN_SIZES))
+for drain in [drain_list, drain_deque]:
+    print("{:<14}".format(drain.__name__) +
+          "".join("{:>9,.2f}".format(seconds_per_call(drain, n) * 1000)
+                  for n in DRAIN_SIZES))
+
+# Conclusions
+# -----------
+
+# + Use a list as a LIFO queue, adding and taking elements at its end
+#   with ``append()`` and ``pop()``.
+
+# + Never use ``pop(0)``, ``insert(0, item)`` or ``del x[0]`` on a
+#   list that can grow large. Each moves all the elements of the list,
+#   and a loop that empties a list this way takes quadratic time.
+
+# + Use a ``collections.deque`` for a FIFO queue, and a deque with
+#   ``maxlen`` for a ring buffer.
+
+# References
+# ----------
+
+# + `collections.deque (SL)`_
+# + `Using lists as queues (Python Tutorial)`_
+# + `Time complexity (Python wiki)`_
+
+# .. _collections.deque (SL): https://docs.python.org/3.7/library/collections.html#collections.deque
+# .. _Using lists as queues (Python Tutorial): https://docs.python.org/3.7/tutorial/datastructures.html#using-lists-as-queues
+# .. _Time complexity (Python wiki): https://wiki.python.org/moin/TimeComplexity
@@ -0,0 +1,379 @@
+# The cost of exceptions: try, except and checking first
+# ======================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Examples 74 to 78 of ``minimal.py`` handle errors with the ``try``
+# statement: opening a file that does not exist, comparing an integer
+# with a string, using an unbound name and indexing a list out of
+# range. Handling an error after it happens is a common style in
+# Python, known as EAFP, *easier to ask for forgiveness than
+# permission*. The opposite style, LBYL, *look before you leap*,
+# checks first, for example with ``len()`` before indexing a list or
+# with ``in`` before looking up a key in a dictionary, and only runs
+# the operation when it will succeed.
+
+# A program that uses exceptions for the usual flow of a loop, such as
+# a parser skipping the fields it does not know, pays for every
+# exception raised. This script measures the cost of a ``try``
+# statement when nothing is raised, the cost of raising and catching
+# the exceptions of Examples 75 to 78, and the failure rate at which
+# checking first becomes faster than catching. The costs depend on
+# the version of Python, which the following example prints,
+
+print('Example 1:')
+
+import sys
+
+print(sys.version_info[:2])
+
+# Raising and catching
+# --------------------
+
+# Each pair of the following functions runs an operation of Examples
+# 75 to 78, once in a form that succeeds and once in a form that
+# raises the exception of the example, which the function catches.
+# The file that does not exist is in a new temporary directory, so it
+# cannot exist by chance, and the file that exists is this script
+# itself,
+
+print('Example 2:')
+
+import os
+import tempfile
+
+directory = tempfile.TemporaryDirectory()
+MISSING = os.path.join(directory.name, "foo")
+alist = ["a"]
+
+
+def open_existing():
+    try:
+        open(__file__).close()
+    except FileNotFoundError:
+        pass
+
+
+def open_missing():
+    try:
+        open(MISSING).close()
+    except FileNotFoundError:
+        pass
+
+
+def compare_numbers():
+    try:
+        1 < 2
+    except TypeError:
+        pass
+
+
+def compare_string():
+    try:
+        1 < "2"
+    except TypeError:
+        pass
+
+
+def bound_name():
+    try:
+        alist
+    except NameError:
+        pass
+
+
+def unbound():
+    try:
+        unbound_name
+    except NameError:
+        pass
+
+
+def index_in_range():
+    try:
+        alist[0]
+    except IndexError:
+        pass
+
+
+def index_out_of_range():
+    try:
+        alist[1]
+    except IndexError:
+        pass
+
+
+PAIRS = [("FileNotFoundError", open_existing, open_missing),
+         ("TypeError", compare_numbers, compare_string),
+         ("NameError", bound_name, unbound),
+         ("IndexError", index_in_range, index_out_of_range)]
+
+# The following table shows the time of a call of each function in
+# nanoseconds, including the cost of calling the function itself,
+# when the operation succeeds and when it raises, and the difference,
+# the cost of raising and catching the exception,
+
+print('Example 3:')
+
+from _timing import seconds_per_call
+
+print("{:<20} {:>10} {:>10} {:>10}".format(
+    "exception", "succeeds", "raises", "cost"))
+for name, succeeds, raises in PAIRS:
+    succeeds_ns = seconds_per_call(succeeds) * 1e9
+    raises_ns = seconds_per_call(raises) * 1e9
+    print("{:<20} {:>10,.0f} {:>10,.0f} {:>10,.0f}".format(
+        name, succeeds_ns, raises_ns, raises_ns - succeeds_ns))
+
+directory.cleanup()
+
+# Opening a file is slow whether it exists or not, as the operating
+# system has to look for it. Failing to open it is even faster than
+# opening it, because creating and closing the file object costs more
+# than the exception, so the difference is negative. For the other
+# three operations, which take a few tens of nanoseconds when they
+# succeed, raising and catching the exception costs several times the
+# operation itself: the interpreter creates an exception object,
+# formats its message, records where it was raised and searches for
+# the ``except`` clause that matches it.
+
+# The same loop in three styles
+# -----------------------------
+
+# The functions of this section add up the elements of a list ``x``
+# found at a list of ``indexes``, some of which may be out of range,
+# as a parser would add up the fields of records, some of which may
+# be missing:
+
+# + ``no_check()`` indexes the list directly, and only works when every
+#   index is in range. It is the fastest possible loop.
+# + ``eafp()`` catches the ``IndexError`` raised by the indexes out of
+#   range.
+# + ``lbyl()`` compares every index with ``len(x)`` first.
+
+print('Example 4:')
+
+
+def no_check(x, indexes):
+    total = 0
+    for index in indexes:
+        total += x[index]
+    return total
+
+
+def eafp(x, indexes):
+    total = 0
+    for index in indexes:
+        try:
+            total += x[index]
+        except IndexError:
+            pass
+    return total
+
+
+def lbyl(x, indexes):
+    total = 0
+    for index in indexes:
+        if index < len(x):
+            total += x[index]
+    return total
+
+
+# The same three styles apply to the keys of a dictionary, where
+# ``in`` checks that a key exists. The method ``get()`` of a
+# dictionary returns a default value for a missing key, so it needs
+# neither a check nor an exception, and is a third choice:
+
+# + ``eafp_dict()`` catches the ``KeyError`` raised by a missing key.
+# + ``lbyl_dict()`` checks the key with ``in`` first, so every key
+#   found is looked up twice.
+# + ``get_dict()`` uses ``get()`` with a default of 0.
+
+print('Example 5:')
+
+
+def eafp_dict(d, keys):
+    total = 0
+    for key in keys:
+        try:
+            total += d[key]
+        except KeyError:
+            pass
+    return total
+
+
+def lbyl_dict(d, keys):
+    total = 0
+    for key in keys:
+        if key in d:
+            total += d[key]
+    return total
+
+
+def get_dict(d, keys):
+    total = 0
+    for key in keys:
+        total += d.get(key, 0)
+    return total
+
+
+# Failure rates
+# -------------
+
+# The following function returns ``n`` indexes into a list of
+# ``SIZE`` elements, a fraction ``rate`` of which are out of range,
+# shuffled with a random number generator created with a fixed seed,
+# so every run of the script uses the same indexes. The dictionary
+# ``d`` has the same keys and values as the list ``x``, so the same
+# indexes serve as keys, the ones out of range being missing keys,
+
+print('Example 6:')
+
+import random
+
+SIZE = 1000
+N = 10 ** 4
+
+x = list(range(SIZE))
+d = dict(enumerate(x))
+
+
+def make_indexes(n, rate):
+    failures = round(n * rate)
+    indexes = [SIZE + index for index in range(failures)]
+    indexes += [index % SIZE for index in range(n - failures)]
+    random.Random(0).shuffle(indexes)
+    return indexes
+
+
+indexes = make_indexes(N, 0.1)
+assert sum(index >= SIZE for index in indexes) == N // 10
+expected = sum(index for index in indexes if index < SIZE)
+assert eafp(x, indexes) == lbyl(x, indexes) == expected
+assert eafp_dict(d, indexes) == lbyl_dict(d, indexes) == expected
+assert get_dict(d, indexes) == expected
+
+# When nothing fails
+# ------------------
+
+# The following table shows the time in nanoseconds per index of each
+# loop when every index is in range,
+
+print('Example 7:')
+
+indexes = make_indexes(N, 0)
+for function, data in [(no_check, x), (eafp, x), (lbyl, x),
+                       (eafp_dict, d), (lbyl_dict, d), (get_dict, d)]:
+    seconds = seconds_per_call(function, data, indexes)
+    print("{:<12} {:>8.1f}".format(function.__name__, seconds / N * 1e9))
+
+# Since Python 3.11 a ``try`` statement costs nothing until an
+# exception is raised, so ``eafp()`` is about as fast as
+# ``no_check()``. Older versions run an instruction to set up every
+# ``try``, which costs a few nanoseconds. ``lbyl()`` pays for the call
+# to ``len()`` and the comparison at every index, and ``lbyl_dict()``
+# for the second lookup of every key. When nothing fails, asking
+# forgiveness is the fastest style.
+
+# Which style wins
+# ----------------
+
+# The following table shows the same loops, in nanoseconds per index,
+# as the fraction of indexes out of range grows,
+
+print('Example 8:')
+
+RATES = [0, 0.01, 0.05, 0.1, 0.2, 0.5, 1]
+LIST_STYLES = [eafp, lbyl]
+DICT_STYLES = [eafp_dict, lbyl_dict, get_dict]
+
+print("{:>6}".format("rate") +
+      "".join("{:>11}".format(function.__name__)
+              for function in LIST_STYLES + DICT_STYLES))
+times = {}
+for rate in RATES:
+    indexes = make_indexes(N, rate)
+    for function in LIST_STYLES:
+        times[function, rate] = seconds_per_call(function, x, indexes) / N
+    for function in DICT_STYLES:
+        times[function, rate] = seconds_per_call(function, d, indexes) / N
+    print("{:>6.0%}".format(rate) +
+          "".join("{:>11.1f}".format(times[function, rate] * 1e9)
+                  for function in LIST_STYLES + DICT_STYLES))
+
+# The time of ``eafp()`` and ``eafp_dict()`` grows in proportion to the
+# failure rate, by the cost of an exception for every index that
+# fails, while the other loops take about the same time at every rate,
+# and even less as more indexes are skipped. Near the rate where two
+# styles take the same time, the faster one can change from one run to
+# the next. Assuming the time of every loop changes in a straight line
+# from the rate 0 to the rate 1, the following function computes the
+# rate at which the line of ``eafp_style`` crosses the line of
+# ``other``, the *break-even* rate. Above it, ``other`` is faster. A
+# break-even rate of 0 means ``other`` is faster at every rate, and
+# ``None`` that it does not become faster as the rate grows, when the
+# lines are parallel, draw apart or only cross above the rate 1,
+
+print('Example 9:')
+
+
+def break_even(eafp_style, other):
+    start = times[other, 0] - times[eafp_style, 0]
+    slope = ((times[eafp_style, 1] - times[eafp_style, 0]) -
+             (times[other, 1] - times[other, 0]))
+    if slope <= 0 or start >= slope:
+        return None
+    return max(0.0, start / slope)
+
+
+for eafp_style, other in [(eafp, lbyl), (eafp_dict, lbyl_dict),
+                          (eafp_dict, get_dict)]:
+    rate = break_even(eafp_style, other)
+    if rate is None:
+        print("{:<10} never beats {}".format(
+            other.__name__, eafp_style.__name__))
+    else:
+        print("{:<10} beats {:<10} above {:.1%}".format(
+            other.__name__, eafp_style.__name__, rate))
+
+# The break-even rate is about the cost of the check divided by the
+# cost of an exception. An exception costs ten times or more as much
+# as a check, so checking first pays off once somewhere between a few
+# percent and a tenth or so of the operations fail. Below that rate
+# the styles take almost the same time, and the saving of asking
+# forgiveness is small. For dictionaries ``get()`` is close to the
+# fastest at any failure rate: it needs no second lookup and raises no
+# exception.
+
+# Conclusions
+# -----------
+
+# + A ``try`` statement costs nothing, or almost nothing before Python
+#   3.11, when no exception is raised. Raising and catching an
+#   exception costs several times a simple operation.
+
+# + Use ``try`` and ``except`` for errors that are rare. When an
+#   operation fails more than a few percent of the time, as a lookup of
+#   optional fields may, check first with ``len()`` or ``in``.
+
+# + For dictionaries, ``get()`` with a default avoids both the
+#   exception and the second lookup.
+
+# References
+# ----------
+
+# + `EAFP (Glossary)`_
+# + `LBYL (Glossary)`_
+# + `Handling Exceptions (Python Tutorial)`_
+
+# .. _EAFP (Glossary): https://docs.python.org/3.7/glossary.html#term-eafp
+# .. _LBYL (Glossary): https://docs.python.org/3.7/glossary.html#term-lbyl
+# .. _Handling Exceptions (Python Tutorial): https://docs.python.org/3.7/tutorial/errors.html#handling-exceptions
@@ -0,0 +1,269 @@
+# Looking up elements: list scans versus hash indexes
+# ===================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# The script ``type_list.py`` shows three ways of looking for an
+# element in a list: the membership operator ``in``, Examples 33 and
+# 34, and the methods ``count()`` and ``index()``, Examples 40 to 44.
+# All three *scan* the list, comparing the element with every element
+# of the list in turn, until a match is found or, for ``count()`` and
+# for elements not in the list, until the end. The time a lookup takes
+# grows with the length of the list.
+
+# A ``set`` or a ``dict`` finds an element by its *hash*, a number
+# computed from the element that tells where in the set or dict it is
+# stored. A lookup by hash takes about the same time however many
+# elements there are. Building a set or dict from a list takes a
+# single pass over the list, so it pays for itself after a few
+# lookups. This script builds such *indexes* for a list, compares the
+# time of lookups with and without them and computes how many lookups
+# it takes for an index to pay for itself.
+
+# Three indexes
+# -------------
+
+# Each lookup of ``type_list.py`` has an index that answers it by
+# hash:
+
+# + ``item in x`` becomes ``item in set(x)``.
+# + ``x.count(item)`` becomes a lookup in a ``collections.Counter``, a
+#   dict mapping every element to its number of occurrences. Looking
+#   up an element not in a ``Counter`` returns 0.
+# + ``x.index(item)`` becomes a lookup in a dict mapping every element
+#   to the index of its first occurrence. The method ``setdefault()``
+#   only adds an element that is not in the dict yet, so later
+#   occurrences do not replace the first one.
+
+# The following example builds the three indexes for the list of
+# Examples 40 to 44 of ``type_list.py`` and confirms they give the same
+# answers as the list,
+
+print('Example 1:')
+
+from collections import Counter
+
+x = ["a", "b", "c", "a", "a"]
+
+
+def first_positions(x):
+    positions = {}
+    for index, item in enumerate(x):
+        positions.setdefault(item, index)
+    return positions
+
+
+members = set(x)
+counts = Counter(x)
+positions = first_positions(x)
+print(sorted(members), counts, positions)
+
+for item in ["a", "b", "c", "d"]:
+    assert (item in x) == (item in members)
+    assert x.count(item) == counts[item]
+    if item in x:
+        assert x.index(item) == positions[item]
+
+# Unlike ``x.index()``, looking up an element that is not in the dict
+# of positions raises a ``KeyError`` exception, not a ``ValueError``
+# exception.
+
+# The data
+# --------
+
+# The lists used for timing hold ``n`` distinct strings in random
+# order. Every timed call looks up the same ``QUERIES`` strings, half
+# of them in the list and half of them not. A scan stops at the first
+# match, so a string in the list takes half a scan on average and a
+# string not in the list takes a whole one. The random numbers are
+# generated from a fixed *seed*, so the data is the same on every run,
+
+print('Example 2:')
+
+import random
+
+QUERIES = 100
+
+
+def make_data(n):
+    rng = random.Random(n)
+    x = ["key{}".format(number) for number in range(n)]
+    rng.shuffle(x)
+    queries = [rng.choice(x) for _ in range(QUERIES // 2)]
+    queries += ["missing{}".format(number) for number in range(QUERIES // 2)]
+    return x, queries
+
+
+x, queries = make_data(10)
+print(x)
+print(queries[:3], queries[-3:])
+
+# Lookups
+# -------
+
+# Each of the following functions looks up all the queries, with a
+# list method or with an index. ``x.index()`` raises a ``ValueError``
+# for the strings not in the list, so ``index_list()`` checks for them
+# with ``in`` first, which is what a program using ``index()`` usually
+# does,
+
+print('Example 3:')
+
+
+def in_list(x, queries):
+    return [query in x for query in queries]
+
+
+def in_set(members, queries):
+    return [query in members for query in queries]
+
+
+def count_list(x, queries):
+    return [x.count(query) for query in queries]
+
+
+def count_counter(counts, queries):
+    return [counts[query] for query in queries]
+
+
+def index_list(x, queries):
+    return [x.index(query) if query in x else None for query in queries]
+
+
+def index_dict(positions, queries):
+    return [positions.get(query) for query in queries]
+
+
+# The lookups in pairs: the name of the lookup, the list function, the
+# index function and the function building the index from the list.
+LOOKUPS = [
+    ("in", in_list, in_set, set),
+    ("count", count_list, count_counter, Counter),
+    ("index", index_list, index_dict, first_positions),
+]
+
+# confirm both functions of each pair give the same answers
+x, queries = make_data(1000)
+for name, scan, lookup, build in LOOKUPS:
+    assert scan(x, queries) == lookup(build(x), queries)
+
+# The number of elements goes from ten up to ten to the power
+# ``MAX_EXPONENT``. You can raise it to 6 or 7, but scanning lists of
+# millions of elements hundreds of times takes a while,
+
+print('Example 4:')
+
+MAX_EXPONENT = 4
+SIZES = [10 ** exponent for exponent in range(1, MAX_EXPONENT + 1)]
+print(SIZES)
+
+# The following table shows the number of lookups per second with
+# a scan of the list and with the index, for each number of elements
+# in the list. The time to build the index is not included. It is
+# measured separately in the next section,
+
+print('Example 5:')
+
+from _timing import seconds_per_call
+
+# seconds per lookup, and per build of an
+# index, for each lookup name and size
+scan_seconds = {}
+lookup_seconds = {}
+build_seconds = {}
+for n in SIZES:
+    x, queries = make_data(n)
+    for name, scan, lookup, build in LOOKUPS:
+        index = build(x)
+        scan_seconds[name, n] = seconds_per_call(scan, x, queries) / QUERIES
+        lookup_seconds[name, n] = (seconds_per_call(lookup, index, queries) /
+                                   QUERIES)
+        build_seconds[name, n] = seconds_per_call(build, x)
+
+print("{:<18}".format("lookups/s") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for name, scan, lookup, build in LOOKUPS:
+    for function, seconds in [(scan, scan_seconds), (lookup, lookup_seconds)]:
+        print("{:<18}".format(function.__name__) +
+              "".join("{:>12,.0f}".format(1 / seconds[name, n])
+                      for n in SIZES))
+
+# The rows of the scans fall about tenfold from one column to the
+# next, because a list ten times longer takes ten times longer to
+# scan. The rows of the indexes stay roughly flat. For ten elements
+# a lookup by hash is only a few times faster than a scan, but for
+# ten thousand elements it is thousands of times faster.
+
+# When an index pays for itself
+# -----------------------------
+
+# Building an index takes a pass over the whole list, about as long as
+# a few scans. If a program looks up ``k`` elements, using an index
+# costs the time to build it plus ``k`` lookups by hash, while not
+# using one costs ``k`` scans. The index pays for itself when
+# ``build + k * lookup < k * scan``, that is when ``k`` is larger than
+# ``build / (scan - lookup)``, the *break-even* number of lookups.
+
+# The following table shows the break-even number of lookups, rounded
+# up, for each number of elements in the list,
+
+print('Example 6:')
+
+import math
+
+
+def break_even(name, n):
+    scan = scan_seconds[name, n]
+    saving = max(scan - lookup_seconds[name, n], scan / 100)
+    return math.ceil(build_seconds[name, n] / saving)
+
+
+print("{:<18}".format("break-even") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for name, scan, lookup, build in LOOKUPS:
+    row = "{:<18}".format(build.__name__)
+    for n in SIZES:
+        row += "{:>12,}".format(break_even(name, n))
+    print(row)
+
+# For the smallest lists a lookup by hash may not be faster than a
+# scan, so ``break_even()`` counts each lookup as saving at least a
+# hundredth of a scan, and a very large number in the table means the
+# index hardly pays off. Otherwise the break-even number of lookups is
+# a handful, and hardly changes with the length of the list: building
+# an index and scanning the list both take time proportional to its
+# length. Building a ``Counter`` is the slowest, so for the shortest
+# lists it takes the most lookups to pay off.
+
+# Conclusions
+# -----------
+
+# + ``in``, ``count()`` and ``index()`` scan a list, so their time
+#   grows with the length of the list. Lookups in a ``set`` or a
+#   ``dict`` take the same time however many elements there are.
+
+# + An index built with ``set()``, ``collections.Counter`` or a dict
+#   costs a few scans of the list. If a program looks up more than a
+#   handful of elements in the same list, build an index first.
+
+# + If the list changes between lookups, the index has to be kept up
+#   to date with it, or rebuilt, which adds to its cost.
+
+# References
+# ----------
+
+# + `Sets (Python Tutorial)`_
+# + `collections.Counter (SL)`_
+# + `Time complexity (Python wiki)`_
+
+# .. _Sets (Python Tutorial): https://docs.python.org/3.7/tutorial/datastructures.html#sets
+# .. _collections.Counter (SL): https://docs.python.org/3.7/library/collections.html#collections.Counter
+# .. _Time complexity (Python wiki): https://wiki.python.org/moin/TimeComplexity
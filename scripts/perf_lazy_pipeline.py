@@ -0,0 +1,265 @@
+# Lazy pipelines: ranges, generators and itertools
+# ================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Example 10 of ``type_list.py`` creates a list from a range object,
+# ``list(range(0, 5))``, and Examples 91 and 92 loop over lists that
+# have been built in full beforehand. Building every intermediate
+# result as a list is natural when the data is small, but every list
+# holds all its elements in memory at the same time. A program that
+# reads a hundred million records, transforms them and keeps some of
+# them builds lists of a hundred million elements at every step, and
+# can run out of memory long before it runs out of time.
+
+# A *lazy* object produces its elements one at a time, when they are
+# asked for, instead of storing them. A ``range`` object computes its
+# elements from its start, stop and step. A *generator expression*,
+# written like a list comprehension but with parentheses instead of
+# square brackets, computes the next element only when the loop
+# consuming it asks for one. The built-in functions ``map()`` and
+# ``filter()`` and the standard library module ``itertools`` provide
+# more lazy building blocks. Connecting lazy steps one after another
+# makes a *pipeline* where every element passes through all the steps
+# before the next one is produced.
+
+# This script compares the memory and time of the same pipeline built
+# with lists and built lazily.
+
+# Lazy objects
+# ------------
+
+# A range object takes the same memory however many elements it has,
+# and so does a generator expression. Their elements are produced by a
+# loop, or by a function consuming an iterable such as ``list()`` or
+# ``sum()``,
+
+print('Example 1:')
+
+import sys
+
+x = range(10 ** 8)
+y = (item * item for item in x)
+print(sys.getsizeof(x), sys.getsizeof(y))
+
+# a generator produces its elements once, when they are asked for
+y = (item * item for item in range(5))
+assert list(y) == [0, 1, 4, 9, 16]
+
+# the generator has been used up
+assert list(y) == []
+
+# Unlike a list, a generator can only be iterated over once. A
+# pipeline that needs its data twice has to create the generator
+# again or keep the data in a list.
+
+# The same pipeline three ways
+# ----------------------------
+
+# The pipeline of this script squares the integers from 0 to ``n``,
+# keeps the squares that are multiples of three and adds them up. The
+# first function builds a list at every step. The second one connects
+# the same steps with generator expressions, and the third one with
+# ``map()`` and ``filter()``,
+
+print('Example 2:')
+
+
+def eager(n):
+    numbers = list(range(n))
+    squares = [item * item for item in numbers]
+    multiples = [item for item in squares if item % 3 == 0]
+    return sum(multiples)
+
+
+def generators(n):
+    numbers = range(n)
+    squares = (item * item for item in numbers)
+    multiples = (item for item in squares if item % 3 == 0)
+    return sum(multiples)
+
+
+def square(item):
+    return item * item
+
+
+def multiple_of_three(item):
+    return item % 3 == 0
+
+
+def map_filter(n):
+    return sum(filter(multiple_of_three, map(square, range(n))))
+
+
+PIPELINES = [eager, generators, map_filter]
+
+# confirm the three pipelines compute the same result
+for pipeline in PIPELINES:
+    assert pipeline(1000) == sum(i * i for i in range(1000) if i % 3 == 0)
+
+# Measuring memory and time
+# -------------------------
+
+# The standard library module ``tracemalloc`` traces every memory
+# allocation made by the interpreter, and records the *peak*, the most
+# memory traced at any one time. The following function returns the
+# peak memory, in bytes, allocated while ``function(*args)`` runs,
+# above the memory in use when it starts. Tracing slows the
+# interpreter down considerably, so the time is measured separately,
+# without tracing. When something else, such as ``ptlp.instrument``,
+# is already tracing, the function leaves tracing on,
+
+print('Example 3:')
+
+import tracemalloc
+
+
+def peak_bytes(function, *args):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        function(*args)
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+# a list of a thousand integers takes more memory than
+# a generator producing the same thousand integers
+assert peak_bytes(eager, 1000) > peak_bytes(generators, 1000)
+
+# Memory
+# ------
+
+# The number of integers going through the pipeline goes from a
+# thousand up to ten to the power ``MAX_EXPONENT``. You can raise it
+# to 8, a hundred million integers, but the list version then needs
+# about eight gigabytes of memory,
+
+print('Example 4:')
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(3, MAX_EXPONENT + 1)]
+print(SIZES)
+
+# The following table shows the peak memory of each pipeline in
+# kilobytes,
+
+print('Example 5:')
+
+print("{:<14}".format("peak KB") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for pipeline in PIPELINES:
+    print("{:<14}".format(pipeline.__name__) +
+          "".join("{:>12,.1f}".format(peak_bytes(pipeline, n) / 1000)
+                  for n in SIZES))
+
+# The peak memory of the list version grows in proportion to the
+# number of integers, about 80 bytes for each one: the list of
+# integers and the list of their squares, with all their integer
+# objects, still exist while the list of multiples of three is built.
+# The lazy versions hold a single element of each step at a time, so
+# their peak memory is the same small number whatever the size.
+
+# Time
+# ----
+
+# The following table shows the time in nanoseconds per integer of
+# each pipeline,
+
+print('Example 6:')
+
+from _timing import seconds_per_call
+
+print("{:<14}".format("ns per item") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for pipeline in PIPELINES:
+    print("{:<14}".format(pipeline.__name__) +
+          "".join("{:>12,.1f}".format(seconds_per_call(pipeline, n) / n * 1e9)
+                  for n in SIZES))
+
+# Saving memory does not cost time. The generator version is about as
+# fast as the list version, because both run the same expressions
+# once for every integer, and for large sizes it can be faster,
+# because it does not need to allocate large lists. The ``map()`` and
+# ``filter()`` version calls a Python function for every step of
+# every integer, which is slower than evaluating the expressions of a
+# generator directly.
+
+# Stopping early with itertools
+# -----------------------------
+
+# Another advantage of a lazy pipeline is that the work stops as soon
+# as the consumer stops asking for elements. The function
+# ``itertools.islice()`` takes the first elements of an iterable,
+# like a slice of a list, and ``itertools.chain()`` joins several
+# iterables one after another. The following example takes the first
+# ten multiples of three among the squares of two ranges. The list
+# version squares every integer of both ranges first, while the lazy
+# version stops after the first 28, from 0 to 27, whose square 729 is
+# the tenth multiple of three,
+
+print('Example 7:')
+
+import itertools
+
+
+def first_eager(n, count):
+    numbers = list(range(n)) + list(range(n, 2 * n))
+    squares = [item * item for item in numbers]
+    multiples = [item for item in squares if item % 3 == 0]
+    return multiples[:count]
+
+
+def first_lazy(n, count):
+    numbers = itertools.chain(range(n), range(n, 2 * n))
+    squares = (item * item for item in numbers)
+    multiples = (item for item in squares if item % 3 == 0)
+    return list(itertools.islice(multiples, count))
+
+
+n = SIZES[-1]
+assert first_eager(n, 10) == first_lazy(n, 10)
+print(first_lazy(n, 10))
+for first in [first_eager, first_lazy]:
+    print("{:<12} {:>14,.1f} us {:>12,.1f} KB".format(
+        first.__name__, seconds_per_call(first, n, 10) * 1e6,
+        peak_bytes(first, n, 10) / 1000))
+
+# Conclusions
+# -----------
+
+# + Every list in a pipeline holds all its elements at once. For large
+#   amounts of data, connect the steps with ranges, generator
+#   expressions, ``map()``, ``filter()`` and the functions of
+#   ``itertools`` instead, so only one element of every step is in
+#   memory at a time.
+
+# + A lazy pipeline is as fast as a pipeline of lists, and stops
+#   working as soon as its consumer stops asking for elements.
+
+# + A generator can only be used once. Build a list when the same data
+#   is needed more than once, or when it needs indexing or sorting.
+
+# References
+# ----------
+
+# + `Generator expressions (Python Tutorial)`_
+# + `itertools (SL)`_
+# + `tracemalloc (SL)`_
+
+# .. _Generator expressions (Python Tutorial): https://docs.python.org/3.7/tutorial/classes.html#generator-expressions
+# .. _itertools (SL): https://docs.python.org/3.7/library/itertools.html
+# .. _tracemalloc (SL): https://docs.python.org/3.7/library/tracemalloc.html
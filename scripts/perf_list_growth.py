@@ -0,0 +1,270 @@
+# Growing lists: how fast are the different ways?
+# ===============================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# The script ``type_list.py`` shows five ways to add elements to the
+# end of a list:
+
+# + The ``append()`` method, Example 46.
+# + The ``extend()`` method, Example 48.
+# + Assignment with addition ``x += iterable``, Examples 51 to 53.
+# + Concatenation and assignment ``x = x + [...]``, Example 54.
+# + Assignment to the slice past the last element,
+#   ``x[len(x):len(x)] = [...]``, Examples 78 and 79.
+
+# The examples in ``type_list.py`` only confirm that each way produces
+# the right list. This script measures how long each one takes when a
+# list is grown one element at a time inside a loop, which is how they
+# are most often used in real programs. The timings are printed in the
+# output of the script, ``perf_list_growth.py.output``, so they change
+# every time the book is built and depend on the computer it is built
+# on. What matters is not the numbers themselves but how they change
+# as the list grows.
+
+# Timing code
+# -----------
+
+# To time a piece of code you use the standard library module
+# ``timeit``. A ``timeit.Timer`` object calls a function a given
+# number of times and returns the total time taken. A single call of a
+# fast function takes too little time to measure reliably, so the
+# number of calls is increased tenfold until they take at least
+# ``TARGET`` seconds. Measurements are disturbed by whatever else the
+# computer is doing, so the smallest of several repeated measurements
+# is the best estimate of the true cost.
+
+# The following function returns the time, in seconds, of a single
+# call ``function(*args)``. The other chapters that time code import
+# the same function from the module ``_timing.py``,
+
+print('Example 1:')
+
+import timeit
+
+TARGET = 0.02
+
+
+def seconds_per_call(function, *args):
+    timer = timeit.Timer(lambda: function(*args))
+    number = 1
+    while True:
+        seconds = timer.timeit(number)
+        if seconds >= TARGET:
+            break
+        number *= 10
+    return min([seconds] + timer.repeat(repeat=2, number=number)) / number
+
+
+# confirm a trivial call takes less than a millisecond
+assert seconds_per_call(len, "abc") < 0.001
+
+# The sizes of the lists grown in this script are powers of ten. They
+# are kept small enough for the book to build quickly. You can raise
+# ``MAX_EXPONENT`` to 7 to grow lists of up to ten million elements,
+# but be prepared to wait,
+
+print('Example 2:')
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(1, MAX_EXPONENT + 1)]
+print(SIZES)
+
+# The five ways of growing a list
+# -------------------------------
+
+# Each of the following functions grows an empty list ``x`` to ``n``
+# elements, one element at a time, using one of the five ways and
+# returns the list,
+
+print('Example 3:')
+
+
+def grow_append(n):
+    x = []
+    for item in range(n):
+        x.append(item)
+    return x
+
+
+def grow_extend(n):
+    x = []
+    for item in range(n):
+        x.extend([item])
+    return x
+
+
+def grow_augmented(n):
+    x = []
+    for item in range(n):
+        x += [item]
+    return x
+
+
+def grow_concatenate(n):
+    x = []
+    for item in range(n):
+        x = x + [item]
+    return x
+
+
+def grow_slice(n):
+    x = []
+    for item in range(n):
+        x[len(x):len(x)] = [item]
+    return x
+
+
+# Before timing the functions it is worth confirming that they all
+# produce the same list,
+
+print('Example 4:')
+
+GROWERS = [grow_append, grow_extend, grow_augmented, grow_concatenate,
+           grow_slice]
+
+for grow in GROWERS:
+    assert grow(1000) == list(range(1000))
+
+# Cost per element
+# ----------------
+
+# The following table shows, for each way of growing a list, the
+# average time in nanoseconds it takes to add *one* element while
+# growing a list to the size at the top of the column. If adding an
+# element takes the same time however long the list is, the numbers
+# in a row stay roughly the same from left to right.
+
+# Growing a list by concatenation gets so slow that it is only timed
+# up to ``QUADRATIC_LIMIT`` elements. Larger sizes are shown with a
+# dash,
+
+print('Example 5:')
+
+QUADRATIC_LIMIT = 10 ** 4
+
+# nanoseconds per element for each function and size
+costs = {}
+for grow in GROWERS:
+    for n in SIZES:
+        if grow is grow_concatenate and n > QUADRATIC_LIMIT:
+            continue
+        costs[grow.__name__, n] = seconds_per_call(grow, n) / n * 1e9
+
+print("{:<18}".format("ns per element") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for grow in GROWERS:
+    row = "{:<18}".format(grow.__name__)
+    for n in SIZES:
+        if (grow.__name__, n) in costs:
+            row += "{:>12.1f}".format(costs[grow.__name__, n])
+        else:
+            row += "{:>12}".format("-")
+    print(row)
+
+# The rows for ``append()``, ``extend()``, ``+=`` and slice assignment
+# stay roughly flat: adding an element costs about the same whether
+# the list has ten elements or a hundred thousand. The row for ``x = x
+# + [item]`` grows from left to right, because every step builds a
+# *new* list and copies every element already in ``x`` into it, as
+# shown by the ``id()`` check in Example 54 of ``type_list.py``.
+
+# Scaling
+# -------
+
+# A clearer way to see how the cost grows is to compare the *total*
+# time to grow a list of ``n`` elements with the time to grow a list
+# ten times smaller. For a way whose cost per element is constant the
+# ratio is close to 10, because it does ten times the work. For
+# concatenation the ratio approaches 100: ten times the elements, each
+# copying a list ten times longer. This is what computer scientists
+# call *quadratic* time, written O(n\ :sup:`2`), as opposed to the
+# *linear* time, O(n), of the other ways,
+
+print('Example 6:')
+
+print("{:<18}".format("ratio to n / 10") +
+      "".join("{:>12,}".format(n) for n in SIZES[1:]))
+for grow in GROWERS:
+    row = "{:<18}".format(grow.__name__)
+    for small, n in zip(SIZES, SIZES[1:]):
+        if (grow.__name__, n) in costs:
+            total = costs[grow.__name__, n] * n
+            ratio = total / (costs[grow.__name__, small] * small)
+            row += "{:>12.1f}".format(ratio)
+        else:
+            row += "{:>12}".format("-")
+    print(row)
+
+# The ratios of the smallest sizes are dominated by the fixed cost of
+# calling the function and creating the empty list, so it is the
+# columns on the right that show the trend.
+
+# The difference is easy to miss while a program is tested with small
+# lists. Growing a list of a million elements by concatenation
+# performs about half a million million element copies, which takes
+# many minutes rather than the fraction of a second the other ways
+# take.
+
+# Adding many elements at once
+# ----------------------------
+
+# When all the elements are available at once there is no need for a
+# loop at all. Building the list in one operation, with ``list()``, a
+# list comprehension or a single call to ``extend()``, moves all or
+# part of the loop from Python code into the interpreter's C code and
+# is faster than any of the element by element ways,
+
+print('Example 7:')
+
+
+def build_list(n):
+    return list(range(n))
+
+
+def build_comprehension(n):
+    return [item for item in range(n)]
+
+
+def build_extend(n):
+    x = []
+    x.extend(range(n))
+    return x
+
+
+n = SIZES[-1]
+for build in [grow_append, build_comprehension, build_extend, build_list]:
+    assert build(n) == list(range(n))
+    print("{:<20} {:>10.1f} ns per element".format(
+        build.__name__, seconds_per_call(build, n) / n * 1e9))
+
+# Conclusions
+# -----------
+
+# + Growing a list with ``append()``, ``extend()``, ``+=`` or slice
+#   assignment takes constant time per element on average, so growing
+#   a list of ``n`` elements takes time proportional to ``n``.
+
+# + Growing a list with ``x = x + [item]`` copies the whole list on
+#   every step, so growing a list of ``n`` elements takes time
+#   proportional to ``n`` squared. Never use it in a loop.
+
+# + When the elements are known up front, build the list in one
+#   operation.
+
+# References
+# ----------
+
+# + `timeit (SL)`_
+# + `Time complexity (Python wiki)`_
+
+# .. _timeit (SL): https://docs.python.org/3.7/library/timeit.html
+# .. _Time complexity (Python wiki): https://wiki.python.org/moin/TimeComplexity
@@ -0,0 +1,265 @@
+# How lists grow and shrink
+# =========================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# The script ``perf_list_growth.py`` shows that adding an element to
+# the end of a list with ``append()`` takes the same time on average
+# however long the list is. This is not obvious: the references of a
+# list are stored in a single block of memory, and when the block is
+# full a larger block has to be allocated and all the references
+# copied into it. The trick is that the list does not grow its block
+# by one reference at a time. It *over-allocates*, reserving room for
+# more elements than it holds, so most appends find a free place.
+
+# This script watches the block of a list change size as elements are
+# appended and removed, computes the average cost per element of the
+# copying and shows how to allocate a list of the right size up front.
+# The sizes are printed in the output of the script,
+# ``perf_list_overallocation.py.output``. They depend on the version
+# of Python the book is built with, and the timings at the end also
+# depend on the computer.
+
+# Capacity
+# --------
+
+# The function ``sys.getsizeof()`` returns the size in bytes of the
+# list object and its block of references, but not of the elements.
+# An empty list has no block, so its size is the size of the list
+# object alone. Every reference takes the size of a memory address,
+# ``struct.calcsize("P")``, 8 bytes on a 64 bit computer. The number
+# of references the block has room for, the *capacity* of the list, is
+# therefore,
+
+print('Example 1:')
+
+import struct
+import sys
+
+EMPTY = sys.getsizeof([])
+POINTER = struct.calcsize("P")
+print(EMPTY, POINTER)
+
+
+def capacity(x):
+    return (sys.getsizeof(x) - EMPTY) // POINTER
+
+
+assert capacity([]) == 0
+
+# appending to an empty list reserves
+# room for more than one element
+x = []
+x.append(1)
+print(capacity(x))
+assert capacity(x) > len(x)
+
+# The growth schedule
+# -------------------
+
+# The following function appends ``n`` elements to an empty list, one
+# at a time, and records the length and the new capacity of the list
+# every time the capacity changes,
+
+print('Example 2:')
+
+
+def growth_schedule(n):
+    x = []
+    schedule = []
+    for item in range(n):
+        before = capacity(x)
+        x.append(item)
+        if capacity(x) != before:
+            schedule.append((len(x), capacity(x)))
+    return schedule
+
+
+# The following table shows the schedule for the first thousand
+# appends: the length of the list when its capacity grew, the new
+# capacity and how many times larger it is than the previous one,
+
+print('Example 3:')
+
+print("{:>8} {:>10} {:>8}".format("length", "capacity", "factor"))
+previous = None
+for length, new in growth_schedule(1000):
+    factor = "" if previous is None else "{:.3f}".format(new / previous)
+    print("{:>8} {:>10} {:>8}".format(length, new, factor))
+    previous = new
+
+# After the first few steps every new capacity is about one eighth
+# larger than the length, rounded to a multiple of four. Because the
+# capacity grows in proportion to the length, a list of ``n``
+# elements is enlarged a number of times proportional to the
+# logarithm of ``n``, not to ``n``.
+
+# Why appending is constant time on average
+# -----------------------------------------
+
+# Every time the capacity grows, the references already in the list
+# are copied to the new block, at worst. The total number of
+# references copied while appending ``n`` elements is therefore at
+# most the sum of the lengths in the schedule. Dividing it by ``n``
+# gives the *amortized* number of copies per element, the cost of the
+# copying averaged over all the appends,
+
+print('Example 4:')
+
+MAX_EXPONENT = 6
+SIZES = [10 ** exponent for exponent in range(1, MAX_EXPONENT + 1)]
+
+print("{:>10} {:>8} {:>14} {:>16}".format(
+    "elements", "resizes", "copies/element", "bytes/element"))
+for n in SIZES:
+    schedule = growth_schedule(n)
+    copies = sum(length - 1 for length, new in schedule)
+    # memory of the block at the end, per element
+    final = schedule[-1][1] * POINTER / n
+    print("{:>10,} {:>8} {:>14.2f} {:>16.2f}".format(
+        n, len(schedule), copies / n, final))
+
+# The number of copies per element stays close to a constant, about
+# 8, however many elements are appended: the schedule is a geometric
+# series, and the sum of a geometric series is a constant times its
+# last term. That is why ``append()`` takes *amortized* constant time,
+# written O(1). The price is the spare room, at most one eighth more
+# than the elements, which shows in the bytes per element above 8.
+# You can raise ``MAX_EXPONENT`` to see the numbers stay the same.
+
+# Shrinking
+# ---------
+
+# Removing elements with ``pop()`` shrinks the block too, but not at
+# every removal: the list only shrinks once fewer than half of its
+# references are in use, so alternating appends and pops at the
+# boundary do not resize the block every time. The following function
+# records the capacity changes while the elements are popped one at a
+# time,
+
+print('Example 5:')
+
+
+def shrink_schedule(x):
+    schedule = []
+    while x:
+        before = capacity(x)
+        x.pop()
+        if capacity(x) != before:
+            schedule.append((len(x), capacity(x)))
+    return schedule
+
+
+x = list(range(1000))
+print("{:>8} {:>10}".format("length", "capacity"))
+for length, new in shrink_schedule(x):
+    print("{:>8} {:>10}".format(length, new))
+
+# Removing all the elements at once with ``del x[:]``, as in Example
+# 83 of ``type_list.py``, or with the method ``clear()``, frees the
+# whole block straight away,
+
+print('Example 6:')
+
+x = list(range(1000))
+del x[:]
+assert capacity(x) == 0
+
+x = list(range(1000))
+x.clear()
+assert capacity(x) == 0
+
+# Preallocation
+# -------------
+
+# A list built with the repetition operator, ``[None] * n``, has a
+# capacity of exactly ``n``. Assigning to its elements by index never
+# resizes it, but the first ``append()`` after that does,
+
+print('Example 7:')
+
+x = [None] * 1000
+assert capacity(x) == 1000
+
+for index in range(len(x)):
+    x[index] = index
+assert capacity(x) == 1000
+
+x.append(1000)
+print(capacity(x))
+assert capacity(x) > 1001
+
+# The capacity of a list built with ``list()`` from an object of known
+# length is the length, while a list comprehension grows by appending
+# and ends up with some spare room,
+
+print('Example 8:')
+
+print(capacity(list(range(1000))), capacity([item for item in range(1000)]))
+
+# The following functions build a list of ``n`` elements by appending
+# and by assigning to a preallocated list. Both are timed with the
+# function ``seconds_per_call()`` of ``perf_list_growth.py``, imported
+# from the module ``_timing.py``,
+
+print('Example 9:')
+
+from _timing import seconds_per_call
+
+
+def build_append(n):
+    x = []
+    for item in range(n):
+        x.append(item)
+    return x
+
+
+def build_preallocated(n):
+    x = [None] * n
+    for index in range(n):
+        x[index] = index
+    return x
+
+
+n = 10 ** 5
+assert build_append(n) == build_preallocated(n)
+for build in [build_append, build_preallocated]:
+    print("{:<20} {:>8.1f} ns per element".format(
+        build.__name__, seconds_per_call(build, n) / n * 1e9))
+
+# Preallocating saves the resizing and the spare room, but the
+# difference in time is small, because the resizing was cheap on
+# average to begin with. It is worth it when the final length is known
+# and memory matters more than simplicity. Preallocating *more* than
+# the final length wastes the memory of the unused references, and
+# preallocating less only delays the first resize.
+
+# Conclusions
+# -----------
+
+# + A list reserves spare room when it grows, about one eighth of its
+#   length, so appending takes constant time on average.
+
+# + ``pop()`` only shrinks a list when it is less than half full.
+#   ``del x[:]`` and ``clear()`` free its block at once.
+
+# + ``[None] * n`` and ``list()`` of an object of known length create
+#   a list with no spare room. Preallocate when the final length is
+#   known exactly.
+
+# References
+# ----------
+
+# + `sys.getsizeof (SL)`_
+# + `Amortized analysis (Wikipedia)`_
+
+# .. _sys.getsizeof (SL): https://docs.python.org/3.7/library/sys.html#sys.getsizeof
+# .. _Amortized analysis (Wikipedia): https://en.wikipedia.org/wiki/Amortized_analysis
@@ -0,0 +1,320 @@
+# Adding up a list: loops, built-in functions and name lookups
+# ============================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Examples 91 and 92 of ``type_list.py`` add up the elements of a list
+# with a ``for`` loop and with a ``while`` loop driven by an index, and
+# Example 60 of ``minimal.py`` accumulates a total with
+# ``sum = sum + n``. Python also provides functions that do the whole
+# loop in one call: the built-in function ``sum()``, the function
+# ``fsum()`` of the module ``math``, and the more general functions
+# ``reduce()`` of the module ``functools`` and ``accumulate()`` of the
+# module ``itertools``.
+
+# This script compares how long these forms take to add up lists of a
+# growing number of integers. It then shows why a loop written at the
+# top level of a script, like the examples of this book, is slower
+# than the same loop inside a function.
+
+# The examples bind the name ``sum`` to the total, which hides the
+# built-in function ``sum()`` until the name is deleted. This script
+# uses the name ``total`` instead.
+
+# Six ways to add up a list
+# -------------------------
+
+# Each of the following functions returns the sum of the elements of
+# the list ``x``:
+
+# + ``for_loop()`` is the loop of Example 91.
+# + ``while_loop()`` is the loop of Example 92.
+# + ``builtin_sum()`` calls ``sum()``.
+# + ``math_fsum()`` calls ``math.fsum()``, which always returns a
+#   floating point number.
+# + ``reduce_add()`` calls ``functools.reduce()``, which applies a
+#   function of two arguments, here ``operator.add``, the function
+#   form of ``+``, to the total so far and the next element.
+# + ``accumulate_last()`` takes the last of the running totals produced
+#   by ``itertools.accumulate()``. A ``collections.deque`` with a
+#   maximum length of one consumes the running totals and keeps only
+#   the last one.
+
+print('Example 1:')
+
+import collections
+import functools
+import itertools
+import math
+import operator
+
+
+def for_loop(x):
+    total = 0
+    for item in x:
+        total = total + item
+    return total
+
+
+def while_loop(x):
+    i = 0
+    total = 0
+    while i < len(x):
+        total = total + x[i]
+        i = i + 1
+    return total
+
+
+def builtin_sum(x):
+    return sum(x)
+
+
+def math_fsum(x):
+    return math.fsum(x)
+
+
+def reduce_add(x):
+    return functools.reduce(operator.add, x, 0)
+
+
+def accumulate_last(x):
+    last = collections.deque(itertools.accumulate(x), maxlen=1)
+    return last[0] if last else 0
+
+
+FORMS = [for_loop, while_loop, builtin_sum, math_fsum, reduce_add,
+         accumulate_last]
+
+# confirm the six forms compute the same total
+x = list(range(1000))
+for form in FORMS:
+    assert form(x) == 499500
+    assert form([]) == 0
+
+# ``fsum()`` is there for floating point numbers rather than for
+# speed. It keeps track of the digits lost to rounding while it adds,
+# so its result is the exact sum rounded once, while ``sum()`` rounds
+# after every addition,
+
+print('Example 2:')
+
+x = [0.1] * 10
+print(sum(x), math.fsum(x))
+assert sum(x) != 1.0 and math.fsum(x) == 1.0
+
+# Time
+# ----
+
+# The number of elements goes from ten up to ten to the power
+# ``MAX_EXPONENT``. You can raise it to see the numbers stay about the
+# same. The following table shows the time in nanoseconds per element,
+
+print('Example 3:')
+
+from _timing import seconds_per_call
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(1, MAX_EXPONENT + 1)]
+
+print("{:<16}".format("ns per element") +
+      "".join("{:>10,}".format(n) for n in SIZES))
+for form in FORMS:
+    row = "{:<16}".format(form.__name__)
+    for n in SIZES:
+        x = list(range(n))
+        row += "{:>10.1f}".format(seconds_per_call(form, x) / n * 1e9)
+    print(row)
+
+# ``sum()`` is the fastest by far, as its loop is compiled code that
+# adds small integers directly, without going through the interpreter
+# for every element. ``fsum()`` does more work per element but is
+# still compiled. ``reduce()`` and ``accumulate()`` loop in compiled
+# code too, but call ``operator.add`` for every element, which costs
+# as much as the ``+`` of a ``for`` loop or more in recent versions of
+# Python. The ``while`` loop is the slowest: for every element it
+# calls ``len()``, compares, indexes the list and adds one to the
+# index, all in the interpreter. For ten elements the fixed cost of
+# each call dominates.
+
+# Local and global names
+# ----------------------
+
+# The chapters of this book run their examples at the top level of
+# the script, not inside functions. At the top level, every name bound
+# by the loop, such as ``total`` and ``item``, is a *global* name,
+# stored in the dictionary of the module, and every use of it looks the
+# name up in that dictionary. Inside a function, the names bound by the
+# function are *local*: the compiler gives each one a numbered slot in
+# the frame of the call, and using it is an access to an array.
+
+# The module ``dis`` shows the instructions the compiler produces. The
+# following example compiles the loop of Example 91 at the top level
+# and inside a function, and prints which kind of instructions each
+# one uses to load and store names,
+
+print('Example 4:')
+
+import dis
+
+FOR_LOOP = """
+total = 0
+for item in x:
+    total = total + item
+"""
+
+WHILE_LOOP = """
+i = 0
+total = 0
+while i < len(x):
+    total = total + x[i]
+    i = i + 1
+"""
+
+
+def module_code(loop):
+    return compile(loop, "<module>", "exec")
+
+
+def function_code(loop):
+    namespace = {}
+    body = "".join("    " + line + "\n" for line in loop.splitlines())
+    source = "def loop(x):\n" + body + "    return total\n"
+    exec(compile(source, "<function>", "exec"), namespace)
+    return namespace["loop"]
+
+
+def name_instructions(code):
+    return sorted({instruction.opname
+                   for instruction in dis.get_instructions(code)
+                   if instruction.opname.startswith(("LOAD_", "STORE_"))})
+
+
+def name_kinds(names):
+    return [kind for kind in ("NAME", "FAST")
+            if any(kind in name for name in names)]
+
+
+module_names = name_instructions(module_code(FOR_LOOP))
+function_names = name_instructions(function_code(FOR_LOOP))
+print("top level:", ", ".join(name_kinds(module_names)))
+print("function: ", ", ".join(name_kinds(function_names)))
+assert "STORE_NAME" in module_names
+assert "STORE_FAST" in function_names
+
+# At the top level, ``STORE_NAME`` and ``LOAD_NAME`` look up the name
+# in a dictionary. Inside the function, ``STORE_FAST`` and
+# ``LOAD_FAST`` use the slot of the name. The exact instructions
+# differ between versions of Python, which combine them into variants
+# such as ``LOAD_FAST_LOAD_FAST``, so the example prints only whether
+# their names contain ``NAME`` or ``FAST``.
+
+# The following table shows the time in nanoseconds per element of
+# the loops of Examples 91 and 92 run at the top level, with the
+# function ``exec()`` and a new dictionary for the global names, and
+# run inside a function, for a list of ``N`` elements, and how many
+# times slower the top level is,
+
+print('Example 5:')
+
+N = 10 ** 5
+x = list(range(N))
+
+
+def run_module(code):
+    exec(code, {"x": x})
+
+
+print("{:<12} {:>10} {:>10} {:>8}".format(
+    "loop", "top level", "function", "slower"))
+for name, loop in [("for", FOR_LOOP), ("while", WHILE_LOOP)]:
+    code = module_code(loop)
+    function = function_code(loop)
+    namespace = {"x": x}
+    exec(code, namespace)
+    assert namespace["total"] == function(x) == sum(x)
+    module_ns = seconds_per_call(run_module, code) / N * 1e9
+    function_ns = seconds_per_call(function, x) / N * 1e9
+    print("{:<12} {:>10.1f} {:>10.1f} {:>8.1f}".format(
+        name, module_ns, function_ns, module_ns / function_ns))
+
+# The same loop is two or more times slower at the top level. The
+# ``while`` loop, which uses more names per element, loses more time
+# per element, but less in proportion, as its call to ``len()`` costs
+# the same in both places. Timing code at the top level, or with a
+# tool like ``ptlp.instrument`` that runs the examples as they are
+# written, therefore measures the cost of the global names as well as
+# the cost of the code. Putting a loop that matters for speed inside a
+# function, and calling it, is the simplest optimization there is.
+
+# Built-in names
+# --------------
+
+# Inside a function, a name that the function does not bind, such as
+# ``len``, is still looked up as a global name, first in the
+# dictionary of the module and then in the built-in names. Recent
+# versions of Python cache these lookups, but calling ``len()`` on
+# every step of the loop still costs a call. The following function
+# calls ``len()`` once and keeps the length in a local name,
+
+print('Example 6:')
+
+
+def while_loop_local_len(x):
+    i = 0
+    n = len(x)
+    total = 0
+    while i < n:
+        total = total + x[i]
+        i = i + 1
+    return total
+
+
+assert while_loop_local_len(x) == while_loop(x)
+for form in [while_loop, while_loop_local_len, for_loop]:
+    print("{:<22} {:>8.1f} ns per element".format(
+        form.__name__, seconds_per_call(form, x) / N * 1e9))
+
+# Keeping the length in a local name saves the call to ``len()`` on
+# every step, but the ``for`` loop is faster still: it needs neither
+# an index nor a length, as the iterator of the list keeps track of
+# both in compiled code.
+
+# Conclusions
+# -----------
+
+# + To add up numbers, call ``sum()``, or ``math.fsum()`` for floating
+#   point numbers when accuracy matters. They are many times faster
+#   than a loop.
+
+# + A ``for`` loop over the elements is faster than a ``while`` loop
+#   over their indexes. ``reduce()`` and ``accumulate()`` are no faster
+#   than a ``for`` loop when they call a function for every element.
+
+# + Loops at the top level of a script use global names, which are
+#   slower than the local names of a function. Put loops that matter
+#   inside functions, and measure them there.
+
+# References
+# ----------
+
+# + `sum (SL)`_
+# + `math.fsum (SL)`_
+# + `functools.reduce (SL)`_
+# + `itertools.accumulate (SL)`_
+# + `Naming and binding (LR)`_
+# + `dis (SL)`_
+
+# .. _sum (SL): https://docs.python.org/3.7/library/functions.html#sum
+# .. _math.fsum (SL): https://docs.python.org/3.7/library/math.html#math.fsum
+# .. _functools.reduce (SL): https://docs.python.org/3.7/library/functools.html#functools.reduce
+# .. _itertools.accumulate (SL): https://docs.python.org/3.7/library/itertools.html#itertools.accumulate
+# .. _Naming and binding (LR): https://docs.python.org/3.7/reference/executionmodel.html#naming-and-binding
+# .. _dis (SL): https://docs.python.org/3.7/library/dis.html
@@ -0,0 +1,276 @@
+# List comprehensions and NumPy arrays
+# ====================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Examples 13 to 17 of ``type_list.py`` create lists with list
+# comprehensions: transforming every element of an iterable, keeping
+# only the elements satisfying a condition and combining the elements
+# of several iterables with more than one ``for`` loop. A list
+# comprehension runs its expression once for every element, as Python
+# code, and every element of the new list is a separate Python object.
+
+# The NumPy library stores numbers of the same type side by side in an
+# *array* and provides operations that work on whole arrays at once, in
+# compiled code. Computing with whole arrays instead of element by
+# element is called *vectorization*. This script computes the results
+# of the list comprehensions of ``type_list.py`` with NumPy arrays,
+# confirms they are the same and compares how long both forms take as
+# the number of elements grows.
+
+# NumPy is not part of the standard library. When it is not installed
+# the script still runs, but only shows and times the list
+# comprehensions.
+
+# Importing NumPy when it is available
+# ------------------------------------
+
+# Importing a module that is not installed raises an ``ImportError``
+# exception. The following example catches the exception and binds the
+# name ``numpy`` to ``None`` instead, so the rest of the script can
+# check whether NumPy is available with ``numpy is not None``,
+
+print('Example 1:')
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    print("NumPy", numpy.__version__)
+else:
+    print("NumPy is not installed, only lists are used")
+
+# Filtering with a boolean mask
+# -----------------------------
+
+# Example 15 of ``type_list.py`` squares the even elements of a range
+# object. The NumPy function ``arange()`` creates an array of integers
+# like ``range()``. Comparing an array with a number, or applying an
+# arithmetic operator to it, works on every element and returns a new
+# array. The comparison ``a % 2 == 0`` returns an array of booleans,
+# a *mask*, and indexing an array with a mask selects the elements
+# where the mask is ``True``. Squaring the selected elements replaces
+# the ``if`` and the expression of the list comprehension,
+
+print('Example 2:')
+
+x = [item ** 2 for item in range(0, 10) if item % 2 == 0]
+assert x == [0, 4, 16, 36, 64]
+
+if numpy is not None:
+    a = numpy.arange(0, 10)
+    mask = a % 2 == 0
+    print(mask)
+    y = a[mask] ** 2
+    print(y)
+
+    # confirm the array has the elements
+    # of the list, converted with tolist()
+    assert y.tolist() == x
+
+# The method ``tolist()`` converts an array to a list of Python
+# objects, which is what makes the comparison with ``==`` possible.
+
+# Nested loops with broadcasting
+# ------------------------------
+
+# Example 16 of ``type_list.py`` multiplies every element of one tuple
+# by every element of another with two ``for`` loops. NumPy does the
+# same by *broadcasting*: when the two operands of an arithmetic
+# operator have different shapes, their axes of length one are
+# stretched to match. Indexing with ``None`` adds an axis of length
+# one, so ``m[:, None]`` is a column and ``n[None, :]`` is a row, and
+# their product is a table with one row for every element of ``m`` and
+# one column for every element of ``n``,
+
+print('Example 3:')
+
+x = [m * n for m in (2, 2, 2) for n in (3, 4, 5) if m * n < 10]
+assert x == [6, 8, 6, 8, 6, 8]
+
+if numpy is not None:
+    m = numpy.array((2, 2, 2))
+    n = numpy.array((3, 4, 5))
+    products = m[:, None] * n[None, :]
+    print(products)
+
+    # the table has the shape (3, 3)
+    assert products.shape == (3, 3)
+
+    # a mask selects the elements row by row,
+    # which is the order of the nested loops
+    y = products[products < 10]
+    assert y.tolist() == x
+
+# Strings
+# -------
+
+# Arrays can also hold strings. The functions of ``numpy.char`` apply
+# the string operations to every element of an array and broadcast
+# like the arithmetic operators. Examples 13, 14 and 17 of
+# ``type_list.py`` become,
+
+print('Example 4:')
+
+x = ["_" + item for item in "abc"]
+assert x == ["_a", "_b", "_c"]
+
+if numpy is not None:
+    letters = numpy.array(list("abc"))
+    assert numpy.char.add("_", letters).tolist() == x
+    assert numpy.char.upper(letters).tolist() == ["A", "B", "C"]
+
+x = [l + m + n
+     for l in ("a", "b")
+     for m in ("c", "d")
+     for n in ("e", "f")]
+
+if numpy is not None:
+    # one axis for each 'for' loop
+    l = numpy.array(("a", "b"))[:, None, None]
+    m = numpy.array(("c", "d"))[None, :, None]
+    n = numpy.array(("e", "f"))[None, None, :]
+    y = numpy.char.add(numpy.char.add(l, m), n)
+    assert y.shape == (2, 2, 2)
+
+    # ravel() flattens the table in the order of the loops
+    assert y.ravel().tolist() == x
+
+# Strings are where NumPy helps the least: the functions of
+# ``numpy.char`` call the Python string methods for every element, so
+# they are not much faster than a list comprehension.
+
+# The number of elements goes from ten up to ten to the power
+# ``MAX_EXPONENT``. You can raise it to 8, a hundred million elements,
+# but a list of that many integers needs several gigabytes of memory,
+
+print('Example 5:')
+
+MAX_EXPONENT = 6
+SIZES = [10 ** exponent for exponent in range(1, MAX_EXPONENT + 1)]
+print(SIZES)
+
+# Filtering
+# ---------
+
+# The following functions compute the squares of the even integers
+# from 0 to ``n``, with a list comprehension and with a mask. The NumPy
+# version asks for 64 bit integers explicitly with ``dtype``, because
+# the default integer type is only 32 bits wide on some computers and
+# the squares of large integers would not fit. Both functions are
+# checked to return the same elements before they are timed,
+
+print('Example 6:')
+
+
+def squares_list(n):
+    return [item ** 2 for item in range(n) if item % 2 == 0]
+
+
+def squares_numpy(n):
+    a = numpy.arange(n, dtype=numpy.int64)
+    return a[a % 2 == 0] ** 2
+
+
+if numpy is not None:
+    assert squares_numpy(1000).tolist() == squares_list(1000)
+
+# The following table shows the time in nanoseconds per element of
+# the ``range`` or array, for each number of elements. The last column
+# is how many times faster the NumPy version is. When NumPy is not
+# installed only the list comprehension is timed,
+
+print('Example 7:')
+
+from _timing import seconds_per_call
+
+
+def compare(list_function, numpy_function):
+    print("{:>12} {:>10} {:>10} {:>8}".format(
+        "elements", "list ns", "numpy ns", "speedup"))
+    for n in SIZES:
+        list_ns = seconds_per_call(list_function, n) / n * 1e9
+        if numpy is None:
+            print("{:>12,} {:>10.1f} {:>10} {:>8}".format(
+                n, list_ns, "-", "-"))
+            continue
+        numpy_ns = seconds_per_call(numpy_function, n) / n * 1e9
+        print("{:>12,} {:>10.1f} {:>10.1f} {:>8.1f}".format(
+            n, list_ns, numpy_ns, list_ns / numpy_ns))
+
+
+compare(squares_list, squares_numpy)
+
+# For ten elements the list comprehension is faster: every NumPy
+# operation has a fixed cost of checking its arguments and creating a
+# new array, which is larger than the cost of the whole loop. As the
+# number of elements grows the fixed cost matters less and the cost
+# per element of the compiled loops of NumPy, which work on raw 64 bit
+# integers instead of Python objects, takes over.
+
+# Products
+# --------
+
+# The nested loops of Example 16 of ``type_list.py`` are timed with a
+# first sequence of ten integers and a second one of ``n // 10``
+# integers, so both forms compute ``n`` products and keep those less
+# than ``n // 2``,
+
+print('Example 8:')
+
+
+def products_list(n):
+    return [m * k for m in range(10) for k in range(n // 10) if m * k < n // 2]
+
+
+def products_numpy(n):
+    products = (numpy.arange(10, dtype=numpy.int64)[:, None] *
+                numpy.arange(n // 10, dtype=numpy.int64)[None, :])
+    return products[products < n // 2]
+
+
+if numpy is not None:
+    assert products_numpy(1000).tolist() == products_list(1000)
+
+compare(products_list, products_numpy)
+
+# Broadcasting creates the whole table of products, including the
+# ones the mask drops, so it does more work than the list
+# comprehension when the condition removes most of the products. Here
+# it keeps most of them and broadcasting pays off in the same way as
+# the mask of Example 7.
+
+# Conclusions
+# -----------
+
+# + A list comprehension with an ``if`` becomes an arithmetic
+#   expression on an array indexed with a boolean mask.
+
+# + A list comprehension with several ``for`` loops becomes an
+#   operation on arrays with one axis for each loop, combined by
+#   broadcasting. The result is flattened in the order of the loops.
+
+# + NumPy pays off for numbers and large sizes. For a handful of
+#   elements, or for strings, a list comprehension is as fast or
+#   faster and does not need a library that may not be installed.
+
+# References
+# ----------
+
+# + `NumPy quickstart`_
+# + `Broadcasting (NumPy)`_
+# + `List comprehensions (Python Tutorial)`_
+
+# .. _NumPy quickstart: https://numpy.org/doc/stable/user/quickstart.html
+# .. _Broadcasting (NumPy): https://numpy.org/doc/stable/user/basics.broadcasting.html
+# .. _List comprehensions (Python Tutorial): https://docs.python.org/3.7/tutorial/datastructures.html#list-comprehensions
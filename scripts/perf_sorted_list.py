@@ -0,0 +1,272 @@
+# Keeping a list sorted
+# =====================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Example 84 of ``type_list.py`` sorts a list in place with the method
+# ``sort()``. Programs that receive their data a little at a time, and
+# need it in order all along, often do the same after every new
+# element: ``append()`` it and ``sort()`` the list again. Sorting a
+# list that is already sorted but for its last element is quick, but
+# it still looks at every element, so receiving ``n`` elements this way
+# takes time proportional to ``n`` squared.
+
+# The standard library module ``bisect`` finds where an element
+# belongs in a sorted list by *binary search*: it compares the element
+# with the middle element of the list, then with the middle element of
+# the half where it belongs and so on, which takes about ``log2(n)``
+# comparisons instead of ``n``. This script builds a small sorted list
+# type on top of ``bisect`` and compares it with sorting after every
+# element and with sorting once at the end.
+
+# Binary search with bisect
+# -------------------------
+
+# The function ``bisect.bisect_left(x, item)`` returns the index where
+# ``item`` would be inserted in the sorted list ``x`` to keep it
+# sorted, before any elements equal to it. That index is also the
+# number of elements of ``x`` less than ``item``. The function
+# ``bisect.insort(x, item)`` inserts ``item`` at that place,
+
+print('Example 1:')
+
+import bisect
+
+x = [10, 20, 30, 30, 40]
+
+# index of the first element not less than the item
+assert bisect.bisect_left(x, 30) == 2
+assert bisect.bisect_left(x, 25) == 2
+assert bisect.bisect_left(x, 5) == 0
+assert bisect.bisect_left(x, 50) == 5
+
+# insert keeping the list sorted
+bisect.insort(x, 25)
+print(x)
+assert x == [10, 20, 25, 30, 30, 40]
+
+# Finding the index is quick, but ``insort()`` still inserts the
+# element with the list method ``insert()``, which moves every element
+# after it by one place.
+
+# A sorted list type
+# ------------------
+
+# The following class keeps its elements in a list, always sorted. It
+# supports the function ``len()``, iteration and the operator ``in``
+# like a list, and has four methods:
+
+# + ``add(item)`` adds an element.
+# + ``remove(item)`` removes one occurrence of an element and, like
+#   the list method ``remove()``, raises a ``ValueError`` exception if
+#   the element is not there.
+# + ``range(low, high)`` returns a list of the elements greater than
+#   or equal to ``low`` and less than ``high``.
+# + ``rank(item)`` returns the number of elements less than ``item``.
+
+# The list is stored in the attribute ``_items``. The leading
+# underscore is a convention meaning the attribute is meant to be used
+# by the methods of the class only, because changing the list directly
+# could leave it unsorted,
+
+print('Example 2:')
+
+
+class SortedList:
+
+    def __init__(self, iterable=()):
+        self._items = sorted(iterable)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, item):
+        index = bisect.bisect_left(self._items, item)
+        return index < len(self._items) and self._items[index] == item
+
+    def __repr__(self):
+        return "SortedList({!r})".format(self._items)
+
+    def add(self, item):
+        bisect.insort(self._items, item)
+
+    def remove(self, item):
+        index = bisect.bisect_left(self._items, item)
+        if index == len(self._items) or self._items[index] != item:
+            raise ValueError("{!r} not in SortedList".format(item))
+        del self._items[index]
+
+    def range(self, low, high):
+        start = bisect.bisect_left(self._items, low)
+        stop = bisect.bisect_left(self._items, high)
+        return self._items[start:stop]
+
+    def rank(self, item):
+        return bisect.bisect_left(self._items, item)
+
+
+# The following example uses all the methods of ``SortedList``,
+
+print('Example 3:')
+
+x = SortedList([30, 10, 40, 20])
+x.add(25)
+x.add(30)
+print(x)
+assert list(x) == [10, 20, 25, 30, 30, 40]
+assert len(x) == 6
+
+assert 25 in x
+assert 35 not in x
+
+# elements from 20 up to, but not including, 30
+assert x.range(20, 30) == [20, 25]
+
+# number of elements less than 30
+assert x.rank(30) == 3
+
+# remove one of the two 30s
+x.remove(30)
+assert list(x) == [10, 20, 25, 30, 40]
+
+# removing an element not in the list fails
+try:
+    x.remove(35)
+except ValueError as error:
+    print(error)
+
+# Streaming inserts
+# -----------------
+
+# The following functions receive the elements of ``values`` one at a
+# time and return them sorted. The first two keep the elements sorted
+# after every new element, so a program could look at them in order at
+# any time. The third one only sorts them once, after the last element,
+# which is all that is needed when nothing looks at the elements until
+# they have all arrived,
+
+print('Example 4:')
+
+
+def append_then_sort(values):
+    x = []
+    for value in values:
+        x.append(value)
+        x.sort()
+    return x
+
+
+def sorted_list(values):
+    x = SortedList()
+    for value in values:
+        x.add(value)
+    return list(x)
+
+
+def sort_once(values):
+    x = []
+    for value in values:
+        x.append(value)
+    x.sort()
+    return x
+
+
+STRATEGIES = [append_then_sort, sorted_list, sort_once]
+
+# The values arrive in random order. The random numbers are generated
+# from a fixed *seed*, so they are the same on every run,
+
+print('Example 5:')
+
+import random
+
+
+def make_values(n):
+    rng = random.Random(n)
+    return [rng.random() for _ in range(n)]
+
+
+# confirm the three ways give the same sorted list
+values = make_values(1000)
+for strategy in STRATEGIES:
+    assert strategy(values) == sorted(values)
+
+# Comparing the three ways
+# ------------------------
+
+# The number of values goes from a thousand up to ten to the power
+# ``MAX_EXPONENT``. You can raise it to 6, a million values, but be
+# prepared to wait. Sorting after every value gets so slow that it is
+# only timed up to ``QUADRATIC_LIMIT`` values. Larger sizes are shown
+# with a dash. The following table shows the time in milliseconds to
+# receive all the values,
+
+print('Example 6:')
+
+from _timing import seconds_per_call
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(3, MAX_EXPONENT + 1)]
+QUADRATIC_LIMIT = 10 ** 4
+
+print("{:<18}".format("ms") + "".join("{:>12,}".format(n) for n in SIZES))
+for strategy in STRATEGIES:
+    row = "{:<18}".format(strategy.__name__)
+    for n in SIZES:
+        if strategy is append_then_sort and n > QUADRATIC_LIMIT:
+            row += "{:>12}".format("-")
+            continue
+        values = make_values(n)
+        row += "{:>12,.1f}".format(seconds_per_call(strategy, values) * 1000)
+    print(row)
+
+# Sorting after every value takes close to a hundred times longer for
+# ten times the values: it is quadratic. Keeping a ``SortedList`` is
+# more than ten times faster, and sorting once at the end is the
+# fastest of all, because the list is only sorted once, by code
+# written in C.
+
+# The time of ``SortedList`` also grows faster than the number of
+# values. Finding the place of a value is quick, but ``insort()``
+# moves on average half the elements of the list on every insertion,
+# so it is quadratic too. Moving elements is so fast that it takes
+# lists of tens of thousands of elements for it to show. Libraries
+# made for large sorted collections, such as ``sortedcontainers``,
+# split the elements into many short sorted lists so that every
+# insertion only moves the elements of one of them.
+
+# Conclusions
+# -----------
+
+# + If nothing looks at the elements before they have all arrived,
+#   collect them with ``append()`` and sort them once at the end.
+
+# + If the elements must be in order all along, find their place with
+#   ``bisect`` instead of sorting the whole list after every new
+#   element.
+
+# + ``bisect_left()`` also answers range queries and ranks, the number
+#   of elements less than a given one, with a binary search instead of
+#   a scan of the list.
+
+# References
+# ----------
+
+# + `bisect (SL)`_
+# + `Sorting HOW TO`_
+# + `Time complexity (Python wiki)`_
+
+# .. _bisect (SL): https://docs.python.org/3.7/library/bisect.html
+# .. _Sorting HOW TO: https://docs.python.org/3.7/howto/sorting.html
+# .. _Time complexity (Python wiki): https://wiki.python.org/moin/TimeComplexity
@@ -0,0 +1,251 @@
+# Building strings: concatenation, join and StringIO
+# ==================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# The script ``minimal.py`` builds strings with the operator ``+``:
+# Example 7 concatenates three strings and Example 58 builds a string
+# in a loop, one element at a time. Strings are *immutable*: a string
+# object never changes once it has been created. So, strictly
+# speaking, ``s = s + item`` creates a new string, copies ``s`` and
+# ``item`` into it and binds ``s`` to it. Building a string of ``n``
+# fragments this way copies the beginning of the string ``n`` times,
+# which takes time proportional to ``n`` squared.
+
+# In practice CPython, the most widely used Python interpreter, has an
+# optimization for this case: when nothing else refers to the string
+# on the left of ``s = s + item`` or ``s += item``, it enlarges the
+# string in place instead of copying it. This script measures when the
+# optimization works, when it does not, and how the two alternatives
+# the language provides, the string method ``join()`` and the class
+# ``io.StringIO``, compare in time and memory.
+
+# Five ways to build a string
+# ---------------------------
+
+# Each of the following functions builds a string from a list of
+# string fragments, adding one fragment at a time:
+
+# + ``concatenate()`` uses ``+=`` on a local variable, where the
+#   optimization of CPython applies.
+# + ``concatenate_attribute()`` uses ``+=`` on an attribute of an
+#   object, like a formatter keeping the text built so far. The
+#   optimization only applies to variables, so every step copies the
+#   whole string.
+# + ``concatenate_shared()`` uses ``+=`` on a local variable, but keeps
+#   a second reference to the string, as a program printing or
+#   checking the text built so far would. The optimization does not
+#   apply either.
+# + ``join_list()`` appends the fragments to a list and joins them
+#   once at the end with ``"".join()``, which computes the length of
+#   the result first and copies every fragment once.
+# + ``string_io()`` writes the fragments to an ``io.StringIO`` object,
+#   an in-memory file, and gets the string with its method
+#   ``getvalue()``.
+
+print('Example 1:')
+
+import io
+
+
+def concatenate(fragments):
+    s = ""
+    for fragment in fragments:
+        s += fragment
+    return s
+
+
+class Text:
+    pass
+
+
+def concatenate_attribute(fragments):
+    text = Text()
+    text.value = ""
+    for fragment in fragments:
+        text.value += fragment
+    return text.value
+
+
+def concatenate_shared(fragments):
+    s = ""
+    for fragment in fragments:
+        previous = s
+        s += fragment
+    return s
+
+
+def join_list(fragments):
+    parts = []
+    for fragment in fragments:
+        parts.append(fragment)
+    return "".join(parts)
+
+
+def string_io(fragments):
+    buffer = io.StringIO()
+    for fragment in fragments:
+        buffer.write(fragment)
+    return buffer.getvalue()
+
+
+BUILDERS = [concatenate, concatenate_attribute, concatenate_shared,
+            join_list, string_io]
+
+# The fragments are short lines of text, like the lines of a log. The
+# following example confirms the five functions build the same string,
+
+print('Example 2:')
+
+
+def make_fragments(n):
+    return ["fragment {}\n".format(number) for number in range(n)]
+
+
+fragments = make_fragments(1000)
+expected = "".join(fragments)
+for build in BUILDERS:
+    assert build(fragments) == expected
+print(repr(expected[:30]))
+
+# The method ``join()`` also accepts a generator expression, for
+# example ``"".join(fragment for fragment in fragments)``, but it
+# builds a list of the fragments internally anyway, so it does not
+# save memory over joining a list.
+
+# Time
+# ----
+
+# The number of fragments goes from a thousand up to ten to the power
+# ``MAX_EXPONENT``. You can raise it to 7, ten million fragments, but
+# be prepared to wait. The two functions where the optimization does
+# not apply get so slow that they are only timed up to
+# ``QUADRATIC_LIMIT`` fragments. Larger sizes are shown with a dash.
+# The following table shows the time in nanoseconds per fragment,
+
+print('Example 3:')
+
+from _timing import seconds_per_call
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(3, MAX_EXPONENT + 1)]
+QUADRATIC_LIMIT = 10 ** 4
+QUADRATIC = [concatenate_attribute, concatenate_shared]
+
+print("{:<24}".format("ns per fragment") +
+      "".join("{:>12,}".format(n) for n in SIZES))
+for build in BUILDERS:
+    row = "{:<24}".format(build.__name__)
+    for n in SIZES:
+        if build in QUADRATIC and n > QUADRATIC_LIMIT:
+            row += "{:>12}".format("-")
+            continue
+        fragments = make_fragments(n)
+        row += "{:>12.1f}".format(seconds_per_call(build, fragments) / n * 1e9)
+    print(row)
+
+# ``join_list()`` is the fastest, ``string_io()`` and the optimized
+# ``concatenate()`` are not far behind, and all three take about the
+# same time per fragment however many fragments there are. The other
+# two take more than ten times longer per fragment for ten times the
+# fragments: they are quadratic, because every ``+=`` copies the whole
+# string built so far.
+
+# Peak memory
+# -----------
+
+# The standard library module ``tracemalloc`` traces every memory
+# allocation made by the interpreter, and records the *peak*, the most
+# memory traced at any one time. The following function returns the
+# peak memory, in bytes, allocated while ``function(*args)`` runs,
+# above the memory in use when it starts. It leaves tracing on when
+# something else, such as ``ptlp.instrument``, is already tracing,
+
+print('Example 4:')
+
+import tracemalloc
+
+
+def peak_bytes(function, *args):
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        function(*args)
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+# The following table shows the peak memory of each way of building a
+# string, divided by the length of the string built, for the largest
+# number of fragments each way was timed with,
+
+print('Example 5:')
+
+for build in BUILDERS:
+    n = QUADRATIC_LIMIT if build in QUADRATIC else SIZES[-1]
+    fragments = make_fragments(n)
+    length = len(build(fragments))
+    print("{:<24} {:>10,} fragments {:>6.2f} bytes per character".format(
+        build.__name__, n, peak_bytes(build, fragments) / length))
+
+# The optimized ``concatenate()`` needs only the memory of the final
+# string, one byte per character for text in the ASCII character set,
+# because it enlarges the same string. The two quadratic ways need
+# twice as much, as the old string and its copy exist at the same time
+# on every step. ``join_list()`` and ``string_io()`` keep all the
+# fragments, or a buffer, until the final string is created, so they
+# need about half as much again as the string itself.
+
+# When the optimization stops helping
+# -----------------------------------
+
+# The optimization of ``+=`` is a detail of CPython, not a rule of the
+# language, and it applies only when:
+
+# + the string is bound to a variable, not to an attribute, an element
+#   of a list or a dictionary,
+# + nothing else refers to the string, so another variable, a list
+#   holding it or a caller keeping it defeats it,
+# + the new fragment is added at the end, ``s = s + item``, not at the
+#   start, ``s = item + s``.
+
+# Python implementations that do not count references, such as PyPy,
+# cannot have it at all, and ``bytes`` objects never benefit from it.
+# A program whose speed depends on it can become quadratic after an
+# innocent change.
+
+# Conclusions
+# -----------
+
+# + To build a string from many fragments, collect them in a list and
+#   join them once with ``"".join()``, or write them to an
+#   ``io.StringIO`` object when they are produced by code that expects
+#   a file.
+
+# + ``+=`` in a loop is only fast in CPython, on a local variable that
+#   nothing else refers to. Anywhere else it copies the whole string on
+#   every step and takes quadratic time.
+
+# References
+# ----------
+
+# + `str.join (SL)`_
+# + `io.StringIO (SL)`_
+# + `Programming recommendations (PEP 8)`_
+
+# .. _str.join (SL): https://docs.python.org/3.7/library/stdtypes.html#str.join
+# .. _io.StringIO (SL): https://docs.python.org/3.7/library/io.html#io.StringIO
+# .. _Programming recommendations (PEP 8): https://www.python.org/dev/peps/pep-0008/#programming-recommendations
@@ -0,0 +1,300 @@
+# Arithmetic on many numbers: loops, arrays and NumPy
+# ===================================================
+
+# .. contents::
+#    :local:
+#    :depth: 1
+#    :backlinks: none
+
+# .. ptlp: output-varies
+
+# Overview
+# --------
+
+# Examples 21 to 23 of ``minimal.py`` evaluate arithmetic expressions,
+# such as ``10 * x ** 2 * y + z / 2 - 1``, on single integers and
+# floating point numbers. Real data is rarely a single number: it is
+# a column of measurements, prices or coordinates, and the same
+# expression has to be evaluated for every element of the columns.
+
+# This script evaluates the expression of Example 22 over three
+# sequences of ``n`` numbers in five ways: a ``for`` loop, a list
+# comprehension, the built-in function ``map()``, a loop over the
+# arrays of the standard library module ``array``, and NumPy arrays
+# when NumPy is installed. It checks that the five results agree and
+# compares how long each way takes as ``n`` grows.
+
+# Importing NumPy when it is available
+# ------------------------------------
+
+# NumPy is not part of the standard library. As in
+# ``perf_numpy_comprehension.py``, the name ``numpy`` is bound to
+# ``None`` when it is not installed, and the script then only shows
+# and times the other four ways,
+
+print('Example 1:')
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    print("NumPy", numpy.__version__)
+else:
+    print("NumPy is not installed, only lists and arrays are used")
+
+# The expression as a function
+# ----------------------------
+
+# The following function evaluates the expression of Example 22. For
+# the values of that example it returns the same result,
+
+print('Example 2:')
+
+
+def expression(x, y, z):
+    return 10 * x ** 2 * y + z / 2 - 1
+
+
+assert expression(2, 3, 4) == 121.0
+
+# The operators of NumPy work on every element of an array, so the
+# same function, called with three arrays, evaluates the expression
+# for all the elements at once and returns an array. This is called
+# *vectorization*,
+
+print('Example 3:')
+
+if numpy is not None:
+    x = numpy.array([2.0, 1.0, 0.5])
+    y = numpy.array([3.0, 2.0, 1.0])
+    z = numpy.array([4.0, 0.0, -2.0])
+    r = expression(x, y, z)
+    print(r)
+    assert r.tolist() == [expression(2.0, 3.0, 4.0),
+                          expression(1.0, 2.0, 0.0),
+                          expression(0.5, 1.0, -2.0)]
+
+# Five ways to evaluate the expression
+# ------------------------------------
+
+# Each of the following functions evaluates the expression for every
+# position of three sequences of the same length and returns the
+# results:
+
+# + ``for_loop()`` appends the results to a list in a ``for`` loop
+#   over the three lists, combined by ``zip()``.
+# + ``comprehension()`` builds the list with a list comprehension.
+# + ``map_function()`` calls the function ``expression()`` for every
+#   position with ``map()``, which accepts several iterables.
+# + ``array_module()`` works on three arrays of the module ``array``
+#   of type code ``"d"``, which store the numbers side by side in 8
+#   bytes each, like a C array. The module has no arithmetic on whole
+#   arrays, so the expression is still evaluated in a loop.
+# + ``numpy_arrays()`` calls ``expression()`` with three NumPy arrays.
+
+print('Example 4:')
+
+import array
+
+
+def for_loop(x, y, z):
+    result = []
+    for a, b, c in zip(x, y, z):
+        result.append(10 * a ** 2 * b + c / 2 - 1)
+    return result
+
+
+def comprehension(x, y, z):
+    return [10 * a ** 2 * b + c / 2 - 1 for a, b, c in zip(x, y, z)]
+
+
+def map_function(x, y, z):
+    return list(map(expression, x, y, z))
+
+
+def array_module(x, y, z):
+    return array.array("d", [10 * a ** 2 * b + c / 2 - 1
+                             for a, b, c in zip(x, y, z)])
+
+
+def numpy_arrays(x, y, z):
+    return expression(x, y, z)
+
+
+# The inputs are floating point numbers computed from the position.
+# ``make_inputs()`` returns them as three lists, and ``INPUTS`` gives,
+# for each function, how to convert the lists to the type of sequence
+# it works on. The NumPy arrays hold 64 bit floating point numbers,
+# ``numpy.float64``, the same as Python floats,
+
+print('Example 5:')
+
+
+def make_inputs(n):
+    x = [(index % 1000) / 100 for index in range(n)]
+    y = [(index % 7) - 3.5 for index in range(n)]
+    z = [(index % 13) * 0.3 for index in range(n)]
+    return x, y, z
+
+
+def as_arrays(x, y, z):
+    return [array.array("d", values) for values in (x, y, z)]
+
+
+def as_numpy(x, y, z):
+    return [numpy.array(values, dtype=numpy.float64) for values in (x, y, z)]
+
+
+def as_lists(x, y, z):
+    return [x, y, z]
+
+
+INPUTS = {for_loop: as_lists, comprehension: as_lists,
+          map_function: as_lists, array_module: as_arrays,
+          numpy_arrays: as_numpy}
+FUNCTIONS = [function for function in INPUTS
+             if function is not numpy_arrays or numpy is not None]
+print([function.__name__ for function in FUNCTIONS])
+
+# Checking the results
+# --------------------
+
+# Floating point arithmetic rounds every result to the nearest number
+# it can represent, so the same computation done in a different order
+# can differ in its last digits,
+
+print('Example 6:')
+
+print((0.1 + 0.2) + 0.3, 0.1 + (0.2 + 0.3))
+assert (0.1 + 0.2) + 0.3 != 0.1 + (0.2 + 0.3)
+
+# All five functions evaluate the operations in the same order, but a
+# library such as NumPy is free to use other instructions of the
+# processor, so the results are compared within a *tolerance* rather
+# than with ``==``. The function ``math.isclose()`` returns ``True``
+# when two numbers differ by at most ``rel_tol`` times the larger of
+# them, or by at most ``abs_tol``, which matters for results close to
+# zero. The following function compares two sequences of results and
+# returns the largest difference found,
+
+print('Example 7:')
+
+import math
+
+REL_TOL = 1e-12
+ABS_TOL = 1e-12
+
+
+def largest_difference(result, expected):
+    assert len(result) == len(expected)
+    for a, b in zip(result, expected):
+        assert math.isclose(a, b, rel_tol=REL_TOL, abs_tol=ABS_TOL), (a, b)
+    return max(abs(a - b) for a, b in zip(result, expected))
+
+
+# The following example evaluates the expression for a thousand
+# positions with every function and compares the results with those
+# of ``for_loop()``. The method ``tolist()`` converts a NumPy array
+# to a list of Python floats,
+
+print('Example 8:')
+
+inputs = make_inputs(1000)
+expected = for_loop(*inputs)
+for function in FUNCTIONS:
+    result = function(*INPUTS[function](*inputs))
+    if function is numpy_arrays:
+        result = result.tolist()
+    print("{:<16} {}".format(function.__name__,
+                             largest_difference(result, expected)))
+
+# Time
+# ----
+
+# The number of elements goes from ten up to ten to the power
+# ``MAX_EXPONENT``. You can raise it to 7, ten million elements, but
+# the three lists of inputs and the list of results then need more
+# than a gigabyte of memory. The conversion of the inputs is not
+# timed. The following table shows the time in nanoseconds per
+# element,
+
+print('Example 9:')
+
+from _timing import seconds_per_call
+
+MAX_EXPONENT = 5
+SIZES = [10 ** exponent for exponent in range(1, MAX_EXPONENT + 1)]
+
+timings = {}
+for n in SIZES:
+    inputs = make_inputs(n)
+    for function in FUNCTIONS:
+        arguments = INPUTS[function](*inputs)
+        timings[function, n] = seconds_per_call(function, *arguments) / n
+
+print("{:<16}".format("ns per element") +
+      "".join("{:>11,}".format(n) for n in SIZES))
+for function in FUNCTIONS:
+    print("{:<16}".format(function.__name__) +
+          "".join("{:>11.1f}".format(timings[function, n] * 1e9)
+                  for n in SIZES))
+
+# The four ways using Python loops take about the same time per
+# element whatever the number of elements, because every element goes
+# through the interpreter: reading the three numbers, creating a new
+# float object for every intermediate result and appending the final
+# one. The differences between them are small: the list comprehension
+# saves looking up and calling the method ``append()``, while
+# ``map()`` adds a call to a Python function for every element. The
+# arrays of the module ``array`` do not help either: they store raw 8
+# byte numbers, so every number read has to be converted to a new
+# float object, and every result converted back.
+
+# The following table shows how many times faster than ``for_loop()``
+# each function is, for the largest number of elements,
+
+print('Example 10:')
+
+n = SIZES[-1]
+for function in FUNCTIONS:
+    print("{:<16} {:>8.1f}".format(
+        function.__name__, timings[for_loop, n] / timings[function, n]))
+
+# When NumPy is installed, ``numpy_arrays()`` is slower than the loops
+# for ten elements, because every operator has a fixed cost of
+# checking its operands and creating a new array. For large sizes it
+# is tens to hundreds of times faster: each operator runs a compiled
+# loop over raw 8 byte numbers. Each operator also creates a temporary
+# array of ``n`` elements for its result, so the expression needs
+# several times the memory of one array while it is evaluated.
+
+# Conclusions
+# -----------
+
+# + A function written with arithmetic operators works on single
+#   numbers and on NumPy arrays alike. Called with arrays, it evaluates
+#   the expression for all the elements in compiled loops, which is
+#   much faster than a Python loop for large sizes.
+
+# + Without NumPy, every way of looping in Python takes about the same
+#   time per element. The module ``array`` saves memory, but not
+#   time.
+
+# + Floating point results can differ in their last digits when the
+#   computation changes. Compare them with ``math.isclose()``, or
+#   ``numpy.allclose()`` for arrays, rather than with ``==``.
+
+# References
+# ----------
+
+# + `array (SL)`_
+# + `math.isclose (SL)`_
+# + `Floating Point Arithmetic (Python Tutorial)`_
+# + `NumPy quickstart`_
+
+# .. _array (SL): https://docs.python.org/3.7/library/array.html
+# .. _math.isclose (SL): https://docs.python.org/3.7/library/math.html#math.isclose
+# .. _Floating Point Arithmetic (Python Tutorial): https://docs.python.org/3.7/tutorial/floatingpoint.html
+# .. _NumPy quickstart: https://numpy.org/doc/stable/user/quickstart.html